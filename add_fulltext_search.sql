@@ -0,0 +1,72 @@
+-- Ranked full-text search over items
+-- Replaces the sequential title/author/text ilike scans with one ranked, limited call
+-- The existing text_tsv column is left as is: match_items still returns it
+
+-- Step 1: Weighted search document in its own column (A = title, B = author, C = text)
+ALTER TABLE items ADD COLUMN IF NOT EXISTS search_tsv tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(author, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(text, '')), 'C')
+) STORED;
+
+-- Step 2: GIN indexes for the weighted document and the per-field match checks
+CREATE INDEX IF NOT EXISTS idx_items_search_tsv ON items USING GIN (search_tsv);
+CREATE INDEX IF NOT EXISTS idx_items_title_tsv ON items USING GIN (to_tsvector('english', coalesce(title, '')));
+CREATE INDEX IF NOT EXISTS idx_items_author_tsv ON items USING GIN (to_tsvector('english', coalesce(author, '')));
+
+-- Step 3: One call for every phrase and field, ranked with field weighting (title > author > text)
+-- ts_rank weights are ordered {D, C, B, A}; returns the card fields that search filters apply to
+DROP FUNCTION IF EXISTS search_items_fulltext(text[], int, int);
+CREATE OR REPLACE FUNCTION search_items_fulltext(
+    phrases text[],
+    match_count int DEFAULT NULL,
+    match_offset int DEFAULT 0
+)
+RETURNS TABLE (
+    id text,
+    title text,
+    author text,
+    text text,
+    type text,
+    lang text,
+    curation_type text,
+    rank float,
+    match_type text
+)
+LANGUAGE SQL STABLE
+AS $$
+    WITH q AS (
+        -- Each phrase is matched as a phrase; phrases are OR-ed together
+        SELECT websearch_to_tsquery(
+            'english',
+            array_to_string(ARRAY(
+                SELECT '"' || replace(p, '"', ' ') || '"'
+                FROM unnest(phrases) AS p
+                WHERE btrim(p) <> ''
+            ), ' or ')
+        ) AS query
+    )
+    SELECT
+        i.id,
+        i.title,
+        i.author,
+        i.text,
+        i.type,
+        i.lang,
+        i.curation_type,
+        ts_rank('{0.1, 0.4, 0.7, 1.0}', i.search_tsv, q.query) AS rank,
+        CASE
+            WHEN to_tsvector('english', coalesce(i.title, '')) @@ q.query THEN 'title'
+            WHEN to_tsvector('english', coalesce(i.author, '')) @@ q.query THEN 'author'
+            ELSE 'text'
+        END AS match_type
+    FROM items i, q
+    WHERE i.search_tsv @@ q.query
+    ORDER BY rank DESC, i.id
+    LIMIT match_count
+    OFFSET match_offset;
+$$;
+
+-- Verification queries:
+-- SELECT id, title, author, lang, curation_type, rank, match_type FROM search_items_fulltext(ARRAY['road not taken'], 10);
+-- SELECT id, similarity FROM match_items((SELECT embedding_vector FROM items WHERE embedding_vector IS NOT NULL LIMIT 1), 0.0, 3);
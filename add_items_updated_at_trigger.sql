@@ -0,0 +1,29 @@
+-- Migration: Keep items.updated_at current when indexed columns change
+-- The embedding snapshot (scripts/export_embedding_snapshot.py) catches up on
+-- rows with updated_at after the snapshot, so embeddings filled in or
+-- regenerated on existing rows (batch_embeddings.py, scripts/generate_embeddings.py)
+-- reach every web worker, not only newly inserted items
+
+-- Step 1: Add updated_at where older schemas lack it
+ALTER TABLE items ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+-- Step 2: Bump updated_at whenever a column stored in the snapshot changes
+CREATE OR REPLACE FUNCTION touch_items_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS items_touch_updated_at ON items;
+CREATE TRIGGER items_touch_updated_at
+BEFORE UPDATE OF embedding, title, author, text, type, lang, curation_type ON items
+FOR EACH ROW EXECUTE FUNCTION touch_items_updated_at();
+
+-- Step 3: Index for the startup catch-up query (updated_at > snapshot time)
+CREATE INDEX IF NOT EXISTS idx_items_updated_at ON items (updated_at);
+
+-- Verification queries:
+-- SELECT tgname FROM pg_trigger WHERE tgrelid = 'items'::regclass AND NOT tgisinternal;
+-- SELECT id, created_at, updated_at FROM items ORDER BY updated_at DESC LIMIT 5;
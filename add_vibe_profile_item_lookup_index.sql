@@ -0,0 +1,14 @@
+-- Migration: Indexed reverse lookup from an item to the vibe profiles containing it
+-- Serves seed_item_ids @> '["<item_id>"]' (PostgREST cs filter) from a jsonb_path_ops GIN
+-- index, which is smaller and faster for containment than the default jsonb_ops index
+
+-- Step 1: Containment-optimized GIN index on seed_item_ids
+CREATE INDEX IF NOT EXISTS idx_vibe_profiles_seed_item_ids_path
+ON vibe_profiles USING GIN (seed_item_ids jsonb_path_ops);
+
+-- Step 2: Drop the general-purpose index it supersedes (only @> queries use it)
+DROP INDEX IF EXISTS idx_vibe_profiles_seed_item_ids;
+
+-- Verification queries:
+-- EXPLAIN SELECT id, name FROM vibe_profiles WHERE seed_item_ids @> '["<item_id>"]'::jsonb;
+-- SELECT id, name, size FROM vibe_profiles WHERE seed_item_ids @> '["<item_id>"]'::jsonb;
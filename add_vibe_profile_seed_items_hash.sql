@@ -0,0 +1,33 @@
+-- Migration: Content hash of each vibe profile's members
+-- seed_items_hash = sha256 hex of the distinct seed_item_ids, sorted by code point and
+-- joined with newlines (NULL for an empty profile), so "does a profile with exactly
+-- these items exist?" is one indexed lookup. The application maintains it on every
+-- membership change.
+
+-- Step 1: Add the column
+ALTER TABLE vibe_profiles ADD COLUMN IF NOT EXISTS seed_items_hash text;
+
+-- Step 2: Backfill existing profiles (COLLATE "C" sorts by code point, matching the application)
+UPDATE vibe_profiles vp
+SET seed_items_hash = (
+    SELECT encode(sha256(convert_to(string_agg(ids.id, E'\n' ORDER BY ids.id COLLATE "C"), 'UTF8')), 'hex')
+    FROM (SELECT DISTINCT jsonb_array_elements_text(vp.seed_item_ids) AS id) ids
+)
+WHERE jsonb_array_length(coalesce(vp.seed_item_ids, '[]'::jsonb)) > 0;
+
+-- Step 3: Find profiles that already share the same content; merge or delete all but one
+-- before creating the unique index (it will fail while duplicates remain)
+SELECT seed_items_hash, array_agg(id) AS profile_ids, array_agg(name) AS names
+FROM vibe_profiles
+WHERE seed_items_hash IS NOT NULL
+GROUP BY seed_items_hash
+HAVING COUNT(*) > 1;
+
+-- Step 4: Unique index (empty profiles keep a NULL hash and never conflict)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vibe_profiles_seed_items_hash
+ON vibe_profiles (seed_items_hash)
+WHERE seed_items_hash IS NOT NULL;
+
+-- Verification queries:
+-- SELECT id, name, size, seed_items_hash FROM vibe_profiles LIMIT 5;
+-- SELECT COUNT(*) FILTER (WHERE seed_items_hash IS NULL AND size > 0) AS missing_hash FROM vibe_profiles;
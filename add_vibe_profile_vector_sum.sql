@@ -0,0 +1,16 @@
+-- Migration: Running centroid sum for vibe profiles
+-- Stores the sum of each profile's L2-normalized member embeddings so adding or
+-- removing one item updates the centroid without re-reading every member
+--
+-- Any writer that changes vector or seed_item_ids outside VibeProfileManager
+-- must also write vector_sum (sum of the members' normalized embeddings, as
+-- recalculate_centroids.py does) or set it to NULL so it is rebuilt;
+-- otherwise the next assign/remove derives the centroid from a stale sum
+
+-- Step 1: Add vector_sum column (NULL until the profile's next membership change,
+-- which recomputes it once from the members and keeps it current from then on)
+ALTER TABLE vibe_profiles ADD COLUMN IF NOT EXISTS vector_sum vector(1536);
+
+-- Verification queries:
+-- SELECT id, name, size, vector_sum IS NOT NULL AS has_vector_sum FROM vibe_profiles LIMIT 5;
+-- SELECT COUNT(*) FILTER (WHERE vector_sum IS NULL) AS pending_backfill FROM vibe_profiles;
@@ -31,7 +31,10 @@ except Exception as e:
 # Initialize vibe profile manager
 try:
     from src.vibe_profile_manager import VibeProfileManager
-    vibe_manager = VibeProfileManager()
+    vibe_manager = VibeProfileManager(
+        vector_index=engine.vector_index if engine else None,
+        result_cache=engine.result_cache if engine else None
+    )
     print("✅ Vibe profile manager initialized successfully")
 except Exception as e:
     print(f"❌ Error initializing vibe profile manager: {e}")
@@ -73,20 +76,14 @@ def search():
         query = data.get('query', '')
         top_k = int(data.get('top_k', 5))
         offset = int(data.get('offset', 0))
+        filters = data.get('filters') or None
 
         if not query.strip():
             return jsonify({'error': 'Query cannot be empty'}), 400
 
-        # Search for similar items - get all results for pagination
-        all_results = engine.search_items(query)
-
-        # Apply offset for pagination
-        if offset > 0:
-            results = all_results[offset:]
-        else:
-            results = all_results
-
-        # Limit to requested page size
+        # Search only this page (plus one row to tell whether another page exists)
+        results = engine.search_items(query, top_k + 1, offset, filters=filters)
+        has_more = len(results) > top_k
         results = results[:top_k]
 
         # Format results to match frontend expectations
@@ -101,7 +98,10 @@ def search():
             'query': query,
             'results': formatted_results,
             'count': len(formatted_results),
-            'total_available': len(all_results)
+            'offset': offset,
+            'has_more': has_more,
+            # Lower-bound estimate: everything seen so far, plus one if another page exists
+            'total_available': offset + len(formatted_results) + (1 if has_more else 0)
         })
 
     except Exception as e:
@@ -124,6 +124,27 @@ def get_item(item_id):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/item/<item_id>/vibe-profiles')
+def get_item_vibe_profiles(item_id):
+    """Get the vibe profiles that contain an item."""
+    if not vibe_manager:
+        return jsonify({'error': 'Vibe profile manager not available'}), 500
+
+    try:
+        profiles = [entry['vibe_profiles'] for entry in vibe_manager.get_vibe_profiles_for_item(item_id)]
+        return jsonify({
+            'item_id': item_id,
+            'vibe_profiles': [{
+                'id': profile['id'],
+                'name': profile.get('name'),
+                'size': profile.get('size')
+            } for profile in profiles],
+            'count': len(profiles)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/create-vibe-profile', methods=['POST'])
 def create_vibe_profile():
     """Create a new vibe profile."""
@@ -186,32 +207,27 @@ def find_similar():
         item_id = data.get('item_id', '')
         top_k = int(data.get('top_k', 5))
         offset = int(data.get('offset', 0))
+        exclude_item_ids = data.get('exclude_item_ids', [])
+        filters = data.get('filters') or None
         
         if not item_id:
             return jsonify({'error': 'Item ID is required'}), 400
         
-        # Get the item first
-        item = engine.get_item_by_id(item_id)
-        if not item:
+        # Nearest neighbours of the item's stored embedding (the item itself is excluded in the index)
+        similar_items = engine.find_similar_items(item_id, top_k + 1, offset, exclude_item_ids, filters)
+        if similar_items is None:
             return jsonify({'error': 'Item not found'}), 404
         
-        # Find similar items using the item's text
-        similar_items = engine.search_items(item.get('text', ''))
-        
-        # Filter out the original item
-        similar_items = [result for result in similar_items if result['item']['id'] != item_id]
-        
-        # Apply offset and limit
-        start_idx = offset
-        end_idx = offset + top_k
-        paginated_results = similar_items[start_idx:end_idx]
+        has_more = len(similar_items) > top_k
+        paginated_results = similar_items[:top_k]
         
         return jsonify({
             'item_id': item_id,
             'results': paginated_results,
             'count': len(paginated_results),
             'offset': offset,
-            'total_available': len(similar_items)
+            'has_more': has_more,
+            'total_available': offset + len(paginated_results) + (1 if has_more else 0)
         })
         
     except Exception as e:
@@ -244,6 +260,41 @@ def find_similar_to_vibe_profile():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/search-vibe-profiles', methods=['POST'])
+def search_vibe_profiles():
+    """Rank vibe profiles by how close their centroids are to a free-text query."""
+    if not engine or not vibe_manager:
+        return jsonify({'error': 'Vibe profile search not available'}), 500
+    
+    try:
+        data = request.get_json()
+        query = data.get('query', '').strip()
+        top_k = int(data.get('top_k', 10))
+        offset = int(data.get('offset', 0))
+        
+        if not query:
+            return jsonify({'error': 'Query is required'}), 400
+        
+        embedding = engine.get_embedding(query)
+        if not embedding:
+            return jsonify({'error': 'Could not embed query'}), 500
+        
+        # One extra result tells whether another page exists
+        results = vibe_manager.search_vibe_profiles(embedding, top_k + 1, offset)
+        has_more = len(results) > top_k
+        
+        return jsonify({
+            'query': query,
+            'results': results[:top_k],
+            'count': len(results[:top_k]),
+            'offset': offset,
+            'has_more': has_more
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/update-vibe-profile-name', methods=['POST'])
 def update_vibe_profile_name():
     """Update the name of a vibe profile."""
@@ -275,8 +326,11 @@ def get_all_vibe_profiles():
         return jsonify({'error': 'Vibe profile manager not available'}), 500
     
     try:
-        vibes = vibe_manager.get_all_vibe_profiles_with_poems()
-        return jsonify({'vibes': vibes, 'count': len(vibes)})
+        # Optional paging over profiles (newest first); omit limit for every profile
+        limit = request.args.get('limit')
+        offset = int(request.args.get('offset', 0))
+        vibes = vibe_manager.get_all_vibe_profiles_with_poems(int(limit) if limit else None, offset)
+        return jsonify({'vibes': vibes, 'count': len(vibes), 'offset': offset})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -303,7 +357,9 @@ def get_vibe_profiles():
         return jsonify({'error': 'Vibe profile manager not available'}), 500
     
     try:
-        profiles = vibe_manager.get_all_vibe_profiles_with_poems()
+        limit = request.args.get('limit')
+        offset = int(request.args.get('offset', 0))
+        profiles = vibe_manager.get_all_vibe_profiles_with_poems(int(limit) if limit else None, offset)
         return jsonify(profiles)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -365,12 +421,14 @@ def search_keywords():
     try:
         data = request.get_json()
         keywords = data.get('keywords', '').strip()
+        top_k = data.get('top_k')
+        offset = int(data.get('offset', 0))
         
         if not keywords:
             return jsonify({'results': []})
         
         # Search for items containing the keywords
-        results = engine.search_by_keywords(keywords)
+        results = engine.search_by_keywords(keywords, int(top_k) if top_k is not None else None, offset)
         
         return jsonify({
             'results': results,
@@ -380,6 +438,24 @@ def search_keywords():
     except Exception as e:
         return jsonify({'error': f'Search failed: {str(e)}'}), 500
 
+@app.route('/suggest')
+def suggest():
+    """Typeahead suggestions for titles and authors"""
+    if not engine:
+        return jsonify({'error': 'Recommendation engine not available'}), 500
+    
+    try:
+        query = request.args.get('q', '')
+        limit = min(int(request.args.get('limit', 8)), 50)
+        
+        return jsonify({
+            'query': query,
+            'suggestions': engine.suggest(query, limit)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Suggest failed: {str(e)}'}), 500
+
 @app.route('/add', methods=['POST'])
 def add_poem():
     """Add a new poem or quote to the database"""
@@ -491,7 +567,12 @@ def health():
     return jsonify({
         'status': 'healthy',
         'engine_available': engine is not None,
-        'vibe_manager_available': vibe_manager is not None
+        'vibe_manager_available': vibe_manager is not None,
+        'embedding_cache': engine.embedding_cache.stats() if engine else None,
+        'result_cache': engine.result_cache.stats() if engine else None,
+        'single_flight': engine.single_flight.stats() if engine else None,
+        'vector_index_recall': engine.vector_index.quantizer.recall
+            if engine and engine.vector_index.quantizer else None
     })
 
 if __name__ == '__main__':
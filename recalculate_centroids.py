@@ -27,6 +27,12 @@ def calculate_centroid(embeddings):
     centroid = np.mean(embeddings_array, axis=0)
     return centroid.tolist()
 
+def calculate_vector_sum(embeddings):
+    """Sum of the L2-normalized embeddings (the running sum the app updates per membership change)"""
+    embeddings_array = np.array(embeddings, dtype=np.float64)
+    norms = np.linalg.norm(embeddings_array, axis=1, keepdims=True)
+    return (embeddings_array / np.where(norms > 0, norms, 1.0)).sum(axis=0).tolist()
+
 def get_vibe_profile_seeds(profile_id):
     """Get all seed items for a vibe profile"""
     # Get items linked to this vibe profile through the seed_item_ids column
@@ -109,10 +115,12 @@ def recalculate_all_centroids():
             print(f"  ❌ Failed to calculate centroid for {profile_name}")
             continue
         
-        # Update the profile with new centroid
+        # Update the profile with new centroid, and the running sum the app
+        # adds to / subtracts from on the next membership change
         try:
             result = sb.table('vibe_profiles').update({
                 'vector': new_centroid,
+                'vector_sum': calculate_vector_sum(seed_embeddings),
                 'size': len(seed_embeddings)
             }).eq('id', profile_id).execute()
             
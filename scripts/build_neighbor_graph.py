@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Precompute the top-k cosine neighbours of every item (offline job)
+"""
+
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.vector_index import VectorIndex, fetch_item_embeddings
+from src.neighbor_graph import NeighborGraph
+
+load_dotenv()
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+if not (SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY):
+    raise SystemExit("Missing environment variables")
+
+sb: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--output", default=os.getenv("NEIGHBOR_GRAPH_PATH", "data/neighbor_graph.npz"))
+    ap.add_argument("--k", type=int, default=50, help="Neighbours to keep per item")
+    ap.add_argument("--block_size", type=int, default=1024, help="Rows per matrix multiplication block")
+    ap.add_argument("--dim", type=int, default=int(os.getenv("EMBEDDING_DIM", "1536")))
+    args = ap.parse_args()
+
+    print("🔍 Loading item embeddings...")
+    index = VectorIndex(dim=args.dim)
+    index.build(fetch_item_embeddings(sb, 'id, embedding'))
+    print(f"📝 Loaded {len(index)} embeddings")
+
+    started = time.time()
+    graph = NeighborGraph.build(index.ids, index.matrix, k=args.k, block_size=args.block_size)
+    print(f"⚡ Computed top-{args.k} neighbours in {time.time() - started:.1f}s")
+
+    graph.save(args.output)
+    print(f"✅ Saved neighbour graph to {args.output}")
+
+if __name__ == "__main__":
+    main()
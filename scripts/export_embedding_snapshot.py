@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Export every item embedding to a memory-mappable .npy snapshot plus id table (offline job)
+
+Web workers and scripts map the snapshot instead of downloading and decoding
+the embeddings, so they share one page-cache copy of the matrix.
+"""
+
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.vector_index import VectorIndex, fetch_item_embeddings, snapshot_table_path
+
+load_dotenv()
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+if not (SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY):
+    raise SystemExit("Missing environment variables")
+
+sb: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--output", default=os.getenv("EMBEDDING_SNAPSHOT_PATH", "data/embeddings.npy"))
+    ap.add_argument("--headroom", type=int, default=1024, help="Spare rows for items added after the export")
+    ap.add_argument("--dim", type=int, default=int(os.getenv("EMBEDDING_DIM", "1536")))
+    args = ap.parse_args()
+
+    # Items created while the export runs are caught up by the engine at startup
+    built_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+    print("🔍 Loading item embeddings...")
+    index = VectorIndex(dim=args.dim)
+    index.build(fetch_item_embeddings(sb))
+    print(f"📝 Loaded {len(index)} embeddings ({len(index.skipped_ids)} missing or the wrong size skipped)")
+
+    index.save_snapshot(args.output, headroom=args.headroom, built_at=built_at)
+    size_mb = os.path.getsize(args.output) / 2**20
+    print(f"✅ Saved {size_mb:.1f} MB snapshot to {args.output} (ids in {snapshot_table_path(args.output)})")
+
+if __name__ == "__main__":
+    main()
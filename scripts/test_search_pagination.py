@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test that paging through hybrid search returns one consistent ranking
+
+Runs against an in-memory engine (synthetic embeddings, no database or OpenAI
+calls): pages of a mixed quoted + free-text query must be disjoint and
+concatenate to the single-call ranking.
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.recommendation_engine import ItemRecommendationEngine
+from src.vector_index import VectorIndex
+from src.keyword_index import KeywordIndex
+from src.trigram_index import TrigramIndex
+from src.result_cache import ResultCache
+from src.single_flight import SingleFlight
+
+DIM = 64
+WORDS = ['night', 'sea', 'winter', 'stone', 'light', 'river', 'bird', 'moon']
+
+def make_engine(items=5000, seed=0, rose_share=0.05):
+    """
+    Engine over synthetic items, with caching disabled so every page is ranked afresh
+
+    "rose" is rare (about rose_share of items), so most of its exact matches lie
+    outside the embedding's nearest items, as for a real quoted phrase.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(items):
+        words = list(rng.choice(WORDS, size=int(rng.integers(4, 30))))
+        if rng.random() < rose_share:
+            for _ in range(int(rng.integers(1, 4))):
+                words.insert(int(rng.integers(0, len(words))), 'rose')
+        rows.append({
+            'id': f'item-{i}',
+            'title': f'Poem {i}',
+            'author': f'Poet {i % 17}',
+            'text': ' '.join(words),
+            'type': 'poem',
+            'embedding': rng.normal(size=DIM).tolist()
+        })
+    query_vector = rng.normal(size=DIM).tolist()
+
+    engine = ItemRecommendationEngine.__new__(ItemRecommendationEngine)
+    engine.vector_index = VectorIndex(dim=DIM)
+    engine.vector_index.build(rows)
+    engine.keyword_index = KeywordIndex()
+    engine.keyword_index.build(rows)
+    engine.trigram_index = TrigramIndex()
+    engine.result_cache = ResultCache(max_entries=0)
+    engine.single_flight = SingleFlight()
+    engine.get_embedding = lambda text: query_vector
+    return engine
+
+def page_through(engine, query, total, page_size):
+    results = []
+    for offset in range(0, total, page_size):
+        results.extend(engine.search_items(query, top_k=page_size, offset=offset))
+    return [result['item']['id'] for result in results][:total]
+
+def test_mixed_query_pages_match_single_ranking():
+    """Pages of a quoted + free-text query are disjoint and equal the one-call ranking"""
+    engine = make_engine()
+    query = '"rose" night'
+    total = 300  # deeper than the hybrid pool, so pages cross into the embedding tail
+
+    single = [result['item']['id'] for result in engine.search_items(query, top_k=total)]
+    for page_size in (6, 10, 25):
+        paged = page_through(engine, query, total, page_size)
+        assert len(paged) == len(set(paged)), f"pages of {page_size} overlap"
+        assert paged == single, f"pages of {page_size} differ from the single-call ranking"
+
+def test_free_text_query_pages_match_single_ranking():
+    """Pure free-text queries page consistently too"""
+    engine = make_engine(seed=1)
+    single = [result['item']['id'] for result in engine.search_items('winter river', top_k=120)]
+    assert page_through(engine, 'winter river', 120, 7) == single
+
+if __name__ == "__main__":
+    test_mixed_query_pages_match_single_ranking()
+    test_free_text_query_pages_match_single_ranking()
+    print("✅ Search pagination is consistent")
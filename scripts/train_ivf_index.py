@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Re-train the IVF coarse quantizer centroids over every item embedding (periodic job)
+
+Run on a schedule (e.g. nightly cron) so the inverted lists keep up with new
+items; the web workers pick up the new centroids on their next start.
+"""
+
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.vector_index import VectorIndex, fetch_item_embeddings
+from src.ivf_index import IVFIndex
+
+load_dotenv()
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+if not (SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY):
+    raise SystemExit("Missing environment variables")
+
+sb: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--output", default=os.getenv("IVF_INDEX_PATH", "data/ivf_centroids.npz"))
+    ap.add_argument("--nlist", type=int, default=None, help="Number of inverted lists (default sqrt(n))")
+    ap.add_argument("--nprobe", type=int, default=int(os.getenv("IVF_NPROBE", "8")), help="Lists probed when measuring recall")
+    ap.add_argument("--recall_k", type=int, default=10, help="k for the recall@k report")
+    ap.add_argument("--dim", type=int, default=int(os.getenv("EMBEDDING_DIM", "1536")))
+    args = ap.parse_args()
+
+    print("🔍 Loading item embeddings...")
+    index = VectorIndex(dim=args.dim)
+    index.build(fetch_item_embeddings(sb, 'id, embedding'))
+    print(f"📝 Loaded {len(index)} embeddings")
+
+    started = time.time()
+    ivf = IVFIndex(nprobe=args.nprobe)
+    ivf.train(index.matrix, args.nlist)
+    print(f"⚡ Trained {ivf.nlist} centroids in {time.time() - started:.1f}s")
+
+    ivf.assign_all(index.matrix)
+    recall = ivf.measure_recall(index.matrix, args.recall_k)
+    print(f"🎯 Recall@{args.recall_k} at nprobe={args.nprobe}: {recall:.3f}")
+
+    ivf.save(args.output)
+    print(f"✅ Saved IVF centroids to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Embedding Cache Module
+
+Two-tier cache for text embeddings: a byte-bounded in-process LRU in front of
+a row-bounded on-disk SQLite store that every worker process shares.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing so trivially different inputs share an entry."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def chash(text: str) -> str:
+    """Content hash of normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU embedding cache with a byte budget and a shared SQLite disk tier."""
+
+    # Disk writes between prunes of least recently used rows over max_disk_rows
+    PRUNE_EVERY = 64
+
+    def __init__(self, model: str, dim: int = 1536, max_bytes: int = 64 * 1024 * 1024,
+                 db_path: Optional[str] = None, max_disk_rows: int = 50000):
+        self.model = model
+        self.dim = dim
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self.max_disk_rows = max_disk_rows
+
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        # Start at the threshold so the first write prunes a store left oversized by an earlier run
+        self._writes_since_prune = self.PRUNE_EVERY
+
+        if self.db_path:
+            try:
+                self._connection()
+            except sqlite3.Error as e:
+                print(f"Embedding cache disk tier disabled: {e}")
+                self.db_path = None
+
+    def key(self, text: str) -> str:
+        """Cache key for a text under this cache's model and dimension."""
+        return f"{self.model}:{self.dim}:{chash(text)}"
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread SQLite connection (connections cannot be shared across threads)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS embeddings ('
+                'key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL, '
+                'last_used REAL NOT NULL DEFAULT 0)'
+            )
+            # Stores created before the disk tier was bounded lack last_used
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(embeddings)')]
+            if 'last_used' not in columns:
+                conn.execute('ALTER TABLE embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)')
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the memory tier, evicting least recently used entries over budget."""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = vector
+            self._bytes += vector.nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for a text, or None on a miss."""
+        key = self.key(text)
+
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector.tolist()
+
+        if self.db_path:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    'SELECT vector FROM embeddings WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute('UPDATE embeddings SET last_used = ? WHERE key = ?', (time.time(), key))
+                    conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error reading embedding cache: {e}")
+                row = None
+            if row is not None:
+                vector = np.frombuffer(row[0], dtype=np.float32)
+                self._remember(key, vector)
+                with self._lock:
+                    self.disk_hits += 1
+                return vector.tolist()
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, text: str, embedding: List[float]):
+        """Store an embedding in both tiers."""
+        key = self.key(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._remember(key, vector)
+
+        if self.db_path:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    'INSERT OR REPLACE INTO embeddings (key, model, dim, vector, last_used) VALUES (?, ?, ?, ?, ?)',
+                    (key, self.model, self.dim, vector.tobytes(), time.time())
+                )
+                conn.commit()
+                self._prune(conn)
+            except sqlite3.Error as e:
+                print(f"Error writing embedding cache: {e}")
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Every PRUNE_EVERY writes, delete the least recently used rows beyond max_disk_rows."""
+        with self._lock:
+            self._writes_since_prune += 1
+            if self._writes_since_prune < self.PRUNE_EVERY:
+                return
+            self._writes_since_prune = 0
+
+        cursor = conn.execute(
+            'DELETE FROM embeddings WHERE key IN ('
+            'SELECT key FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+            (self.max_disk_rows,)
+        )
+        conn.commit()
+        if cursor.rowcount > 0:
+            with self._lock:
+                self.disk_evictions += cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and eviction counters plus current memory usage."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_evictions': self.disk_evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_disk_rows': self.max_disk_rows
+            }
@@ -0,0 +1,165 @@
+"""
+IVF Index Module
+
+Inverted-file coarse quantizer over the embedding matrix: k-means centroids
+partition the rows into lists, and a query only scores the rows in its
+nprobe nearest lists. Centroids are trained offline by
+scripts/train_ivf_index.py and new items are assigned to their nearest list.
+"""
+
+import os
+import tempfile
+import threading
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from typing import List, Optional
+
+
+class IVFIndex:
+    """K-means inverted lists over the rows of a normalized embedding matrix."""
+
+    # Training rows sampled per centroid; more adds little to centroid quality
+    TRAIN_SAMPLES_PER_LIST = 64
+
+    def __init__(self, centroids: Optional[np.ndarray] = None, nprobe: int = 8):
+        self.centroids = centroids
+        self.nprobe = nprobe
+        self.trained_size = 0
+        # Per-row list assignment (-1 until assigned) and per-list row members
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._lists: List[List[int]] = []
+        self._list_arrays: List[Optional[np.ndarray]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._assignments.shape[0]
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self.centroids is None else self.centroids.shape[0]
+
+    @staticmethod
+    def default_nlist(n: int) -> int:
+        """Roughly sqrt(n) lists, the usual balance of probe cost against list length."""
+        return max(1, int(np.sqrt(n)))
+
+    def train(self, matrix: np.ndarray, nlist: Optional[int] = None, seed: int = 0):
+        """
+        Fit nlist k-means centroids to a sample of the matrix rows.
+
+        Args:
+            matrix: L2-normalized (n, d) float32 matrix
+            nlist: Number of inverted lists (defaults to sqrt(n))
+            seed: Sampling and k-means seed
+        """
+        n = matrix.shape[0]
+        nlist = min(nlist or self.default_nlist(n), n)
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, nlist * self.TRAIN_SAMPLES_PER_LIST)
+        sample = matrix[np.sort(rng.choice(n, size=sample_size, replace=False))]
+
+        kmeans = MiniBatchKMeans(n_clusters=nlist, random_state=seed, n_init=1, batch_size=4096)
+        kmeans.fit(sample)
+        centroids = kmeans.cluster_centers_.astype(np.float32)
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+        with self._lock:
+            self.centroids = np.ascontiguousarray(centroids)
+            self.trained_size = n
+
+    def _nearest_lists(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=-1).astype(np.int32)
+
+    def assign_all(self, matrix: np.ndarray, block_size: int = 8192):
+        """Assign every row of the matrix to its nearest centroid."""
+        assignments = np.empty(matrix.shape[0], dtype=np.int32)
+        for start in range(0, matrix.shape[0], block_size):
+            assignments[start:start + block_size] = self._nearest_lists(matrix[start:start + block_size])
+
+        order = np.argsort(assignments, kind='stable')
+        bounds = np.searchsorted(assignments[order], np.arange(self.nlist + 1))
+        with self._lock:
+            self._assignments = assignments
+            self._lists = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(self.nlist)]
+            self._list_arrays = [None] * self.nlist
+
+    def set(self, row: int, vector: np.ndarray):
+        """Assign one normalized vector to its nearest list, appending when row == len(self)."""
+        target = int(self._nearest_lists(vector))
+        with self._lock:
+            if row == self._assignments.shape[0]:
+                self._assignments = np.append(self._assignments, np.int32(-1))
+            previous = int(self._assignments[row])
+            if previous == target:
+                return
+            if previous >= 0:
+                self._lists[previous].remove(row)
+                self._list_arrays[previous] = None
+            self._assignments[row] = target
+            self._lists[target].append(row)
+            self._list_arrays[target] = None
+
+    def _list_rows(self, list_id: int) -> np.ndarray:
+        rows = self._list_arrays[list_id]
+        if rows is None:
+            rows = np.array(sorted(self._lists[list_id]), dtype=np.int64)
+            self._list_arrays[list_id] = rows
+        return rows
+
+    def candidates(self, query: np.ndarray, rows: Optional[np.ndarray] = None,
+                   nprobe: Optional[int] = None) -> np.ndarray:
+        """
+        Rows in the lists nearest to a query.
+
+        Args:
+            query: L2-normalized query vector
+            rows: Restrict candidates to these rows (sorted); None allows every row
+            nprobe: Lists to probe (defaults to self.nprobe)
+
+        Returns:
+            Sorted candidate rows
+        """
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        similarities = self.centroids @ query
+        probed = np.argpartition(-similarities, nprobe - 1)[:nprobe] if nprobe < self.nlist else range(self.nlist)
+        with self._lock:
+            lists = [self._list_rows(int(list_id)) for list_id in probed]
+        candidates = np.sort(np.concatenate(lists)) if lists else np.zeros(0, dtype=np.int64)
+        if rows is not None:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        return candidates
+
+    def measure_recall(self, matrix: np.ndarray, k: int = 10, queries: int = 100, seed: int = 0) -> float:
+        """Recall@k of probing nprobe lists, against brute force over sampled rows."""
+        n = min(matrix.shape[0], len(self))
+        if n <= k:
+            return 1.0
+        sample = np.random.default_rng(seed).choice(n, size=min(queries, n), replace=False)
+        found = 0
+        for row in sample:
+            query = np.asarray(matrix[row], dtype=np.float32)
+            exact = matrix[:n] @ query
+            exact[row] = -np.inf
+            truth = np.argpartition(-exact, k - 1)[:k]
+            found += np.isin(truth, self.candidates(query), assume_unique=True).sum()
+        return float(found / (k * sample.shape[0]))
+
+    def save(self, path: str):
+        """Write the trained centroids (list membership is recomputed on load)."""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, centroids=self.centroids, trained_size=np.int64(self.trained_size))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 8) -> 'IVFIndex':
+        """Read centroids written by save()."""
+        with np.load(path) as data:
+            index = cls(data['centroids'].astype(np.float32), nprobe)
+            index.trained_size = int(data['trained_size'])
+        return index
@@ -0,0 +1,237 @@
+"""
+Keyword Index Module
+
+In-process inverted index over item titles, authors and text. Postings keep
+token positions so quoted phrases match exactly; ranking is BM25 with
+per-field boosts (title > author > text).
+"""
+
+import math
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+FIELDS = ('title', 'author', 'text')
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase word tokens of a text."""
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def utc_now() -> str:
+    """Current time as the ISO timestamp stored in built_at."""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+class KeywordIndex:
+    """BM25 inverted index with positional postings per field."""
+
+    SNAPSHOT_VERSION = 2
+
+    def __init__(self, field_boosts: Optional[Dict[str, float]] = None, k1: float = 1.2, b: float = 0.75):
+        self.field_boosts = field_boosts or {'title': 3.0, 'author': 2.0, 'text': 1.0}
+        self.k1 = k1
+        self.b = b
+
+        self.doc_ids: List[str] = []
+        self.id_to_doc: Dict[str, int] = {}
+        self.deleted = set()
+        # postings[field][term] -> {doc: [positions]}
+        self.postings: Dict[str, Dict[str, Dict[int, List[int]]]] = {field: {} for field in FIELDS}
+        self.field_lengths: Dict[str, List[int]] = {field: [] for field in FIELDS}
+        self.total_lengths: Dict[str, int] = {field: 0 for field in FIELDS}
+        # (title, author) of each document, so title/author indexes need no scan of their own
+        self.labels: List[Tuple[str, str]] = []
+        self.built_at: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_ids) - len(self.deleted)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.id_to_doc
+
+    def build(self, items: Iterable[Dict[str, Any]], built_at: Optional[str] = None):
+        """
+        Index every item (dicts with 'id', 'title', 'author' and 'text').
+
+        Args:
+            items: Items to index
+            built_at: ISO timestamp taken before the items were fetched, so rows
+                inserted during the fetch are picked up by the created_at catch-up
+                (defaults to now, which is only safe for items already in hand)
+        """
+        built_at = built_at or utc_now()
+        for item in items:
+            self.add(item)
+        self.built_at = built_at
+
+    def add(self, item: Dict[str, Any]):
+        """Index one item, replacing any earlier version of it."""
+        with self._lock:
+            previous = self.id_to_doc.get(item['id'])
+            if previous is not None:
+                # Postings are append-only; the old document is tombstoned
+                self.deleted.add(previous)
+
+            doc = len(self.doc_ids)
+            self.doc_ids.append(item['id'])
+            self.id_to_doc[item['id']] = doc
+            self.labels.append((item.get('title') or '', item.get('author') or ''))
+
+            for field in FIELDS:
+                tokens = tokenize(item.get(field))
+                self.field_lengths[field].append(len(tokens))
+                self.total_lengths[field] += len(tokens)
+                field_postings = self.postings[field]
+                for position, token in enumerate(tokens):
+                    field_postings.setdefault(token, {}).setdefault(doc, []).append(position)
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """Id, title and author of every live document."""
+        with self._lock:
+            return [{'id': item_id, 'title': title, 'author': author}
+                    for doc, (item_id, (title, author)) in enumerate(zip(self.doc_ids, self.labels))
+                    if doc not in self.deleted]
+
+    def _phrase_frequencies(self, tokens: List[str]) -> Dict[str, Dict[int, int]]:
+        """Per field, how many times the token sequence occurs in each document."""
+        frequencies = {}
+        for field in FIELDS:
+            field_postings = self.postings[field]
+            lists = [field_postings.get(token) for token in tokens]
+            if not all(lists):
+                continue
+
+            # Walk the rarest token's documents, checking the others line up
+            docs = min(lists, key=len).keys()
+            matches = {}
+            for doc in docs:
+                if doc in self.deleted or any(doc not in postings for postings in lists):
+                    continue
+                if len(tokens) == 1:
+                    count = len(lists[0][doc])
+                else:
+                    following = [set(postings[doc]) for postings in lists[1:]]
+                    count = sum(
+                        1 for start in lists[0][doc]
+                        if all(start + i + 1 in positions for i, positions in enumerate(following))
+                    )
+                if count:
+                    matches[doc] = count
+            if matches:
+                frequencies[field] = matches
+        return frequencies
+
+    def search(self, phrases: List[str], limit: Optional[int] = None, offset: int = 0) -> List[Tuple[str, float, str]]:
+        """
+        Rank items matching any of the phrases.
+
+        Args:
+            phrases: Phrases to match; each is matched as an exact token sequence
+            limit: Maximum number of results to return (None for all)
+            offset: Number of leading results to skip
+
+        Returns:
+            List of (item_id, score, best_matching_field), best first
+        """
+        # Postings are mutated in place by add(), so read them under the same lock
+        with self._lock:
+            return self._search(phrases, limit, offset)
+
+    def _search(self, phrases: List[str], limit: Optional[int], offset: int) -> List[Tuple[str, float, str]]:
+        """search() body (caller holds the lock)."""
+        total_docs = len(self)
+        if total_docs == 0:
+            return []
+
+        average_lengths = {
+            field: (self.total_lengths[field] / len(self.doc_ids)) or 1.0 for field in FIELDS
+        }
+        scores: Dict[int, float] = {}
+        best_field: Dict[int, str] = {}
+
+        for phrase in phrases:
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            frequencies = self._phrase_frequencies(tokens)
+            matched_docs = set()
+            for docs in frequencies.values():
+                matched_docs.update(docs)
+            if not matched_docs:
+                continue
+
+            document_frequency = len(matched_docs)
+            idf = math.log(1 + (total_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+
+            for doc in matched_docs:
+                # BM25F: boost and length-normalize each field's frequency before saturation
+                weighted_tf = 0.0
+                for field, docs in frequencies.items():
+                    tf = docs.get(doc)
+                    if not tf:
+                        continue
+                    length_norm = 1 - self.b + self.b * self.field_lengths[field][doc] / average_lengths[field]
+                    weighted_tf += self.field_boosts[field] * tf / length_norm
+                    if doc not in best_field or FIELDS.index(field) < FIELDS.index(best_field[doc]):
+                        best_field[doc] = field
+                scores[doc] = scores.get(doc, 0.0) + idf * weighted_tf / (self.k1 + weighted_tf)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        end = None if limit is None else offset + limit
+        return [(self.doc_ids[doc], scores[doc], best_field[doc]) for doc in ranked[offset:end]]
+
+    def save(self, path: str):
+        """Write a snapshot that load() can restore without re-tokenizing."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            state = {
+                'version': self.SNAPSHOT_VERSION,
+                'field_boosts': self.field_boosts,
+                'k1': self.k1,
+                'b': self.b,
+                'doc_ids': self.doc_ids,
+                'deleted': self.deleted,
+                'postings': self.postings,
+                'field_lengths': self.field_lengths,
+                'total_lengths': self.total_lengths,
+                'labels': self.labels,
+                'built_at': self.built_at
+            }
+            # Unique temp file per writer: several workers may save the same snapshot at once
+            fd, temp_path = tempfile.mkstemp(dir=directory or '.', prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+
+    @classmethod
+    def load(cls, path: str) -> 'KeywordIndex':
+        """Restore an index from a snapshot written by save()."""
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != cls.SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported keyword index snapshot version: {state.get('version')}")
+        index = cls(state['field_boosts'], state['k1'], state['b'])
+        index.doc_ids = state['doc_ids']
+        index.id_to_doc = {item_id: doc for doc, item_id in enumerate(index.doc_ids)}
+        index.deleted = state['deleted']
+        index.postings = state['postings']
+        index.field_lengths = state['field_lengths']
+        index.total_lengths = state['total_lengths']
+        index.labels = state['labels']
+        index.built_at = state['built_at']
+        return index
@@ -0,0 +1,208 @@
+"""
+Item Neighbour Graph Module
+
+Precomputed top-k cosine neighbours for every item, stored compactly as an
+int32 row array plus a float16 score array so "similar items" is a lookup.
+"""
+
+import os
+import numpy as np
+from typing import List, Dict, Optional, Iterable, Tuple
+
+
+def compute_neighbors(matrix: np.ndarray, k: int = 50, block_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k cosine neighbours of every row of a normalized matrix, one block at a time.
+
+    Args:
+        matrix: L2-normalized (n, d) float32 matrix
+        k: Neighbours to keep per row
+        block_size: Rows per matrix multiplication block (bounds peak memory to block_size * n)
+
+    Returns:
+        Tuple of (n, k) int32 neighbour rows (-1 padded) and (n, k) float16 scores
+    """
+    n = matrix.shape[0]
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.full((n, k), -np.inf, dtype=np.float16)
+    kk = min(k, n - 1)
+    if kk <= 0:
+        return neighbors, scores
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        block = matrix[start:end] @ matrix.T
+        # An item is never its own neighbour
+        block[np.arange(end - start), np.arange(start, end)] = -np.inf
+
+        top = np.argpartition(-block, kk - 1, axis=1)[:, :kk]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+
+        neighbors[start:end, :kk] = np.take_along_axis(top, order, axis=1)
+        scores[start:end, :kk] = np.take_along_axis(top_scores, order, axis=1)
+
+    return neighbors, scores
+
+
+class NeighborGraph:
+    """Item-to-item nearest-neighbour lists kept in memory and persisted as .npz."""
+
+    def __init__(self, ids: Optional[List[str]] = None, neighbors: Optional[np.ndarray] = None,
+                 scores: Optional[np.ndarray] = None, k: int = 50):
+        self.ids: List[str] = list(ids or [])
+        self.k = neighbors.shape[1] if neighbors is not None else k
+        self.neighbors = neighbors if neighbors is not None else np.full((0, self.k), -1, dtype=np.int32)
+        self.scores = scores if scores is not None else np.full((0, self.k), -np.inf, dtype=np.float16)
+        self.id_to_row: Dict[str, int] = {item_id: row for row, item_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def neighbors(self) -> np.ndarray:
+        """The live rows of the neighbour array (a view, not a copy)."""
+        return self._neighbors[:len(self.ids)]
+
+    @neighbors.setter
+    def neighbors(self, neighbors: np.ndarray):
+        self._neighbors = neighbors
+
+    @property
+    def scores(self) -> np.ndarray:
+        """The live rows of the score array (a view, not a copy)."""
+        return self._scores[:len(self.ids)]
+
+    @scores.setter
+    def scores(self, scores: np.ndarray):
+        self._scores = scores
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.id_to_row
+
+    @classmethod
+    def build(cls, ids: List[str], matrix: np.ndarray, k: int = 50, block_size: int = 1024) -> 'NeighborGraph':
+        """Compute the graph for every row of a normalized embedding matrix."""
+        neighbors, scores = compute_neighbors(matrix, k, block_size)
+        return cls(ids, neighbors, scores, k)
+
+    def save(self, path: str):
+        """Write the graph to a compressed .npz file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(path, ids=np.array(self.ids), neighbors=self.neighbors, scores=self.scores)
+
+    @classmethod
+    def load(cls, path: str) -> 'NeighborGraph':
+        """Read a graph written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['ids'].tolist(), data['neighbors'], data['scores'])
+
+    def align(self, ids: List[str], matrix: np.ndarray) -> 'NeighborGraph':
+        """
+        Re-order the graph so its rows match another id order (e.g. the vector index).
+
+        Items missing from the graph are inserted incrementally; neighbours that
+        no longer exist are dropped.
+        """
+        n = len(ids)
+        remap = np.full(len(self.ids) + 1, -1, dtype=np.int32)  # last slot maps -1 padding
+        for new_row, item_id in enumerate(ids):
+            old_row = self.id_to_row.get(item_id)
+            if old_row is not None:
+                remap[old_row] = new_row
+
+        aligned = NeighborGraph(k=self.k)
+        aligned.ids = list(ids)
+        aligned.id_to_row = {item_id: row for row, item_id in enumerate(ids)}
+        aligned.neighbors = np.full((n, self.k), -1, dtype=np.int32)
+        aligned.scores = np.full((n, self.k), -np.inf, dtype=np.float16)
+        missing = []
+        for new_row, item_id in enumerate(ids):
+            old_row = self.id_to_row.get(item_id)
+            if old_row is None:
+                missing.append(new_row)
+                continue
+            rows = remap[self.neighbors[old_row]]
+            keep = rows >= 0
+            count = int(keep.sum())
+            aligned.neighbors[new_row, :count] = rows[keep]
+            aligned.scores[new_row, :count] = self.scores[old_row][keep]
+
+        for row in missing:
+            aligned._link(row, matrix)
+        return aligned
+
+    def add(self, item_id: str, row: int, matrix: np.ndarray) -> bool:
+        """
+        Incrementally add the item stored at a row of the embedding matrix.
+
+        The graph mirrors the vector index row for row, so the row must be the
+        next one (len(self)); the caller passes the row the index assigned while
+        still holding the index lock. One matrix-vector product gives the new
+        item's neighbours and tells which existing rows should now list it.
+        """
+        if item_id in self.id_to_row or row != len(self.ids) or matrix.shape[0] <= row:
+            return False
+        if row == self._neighbors.shape[0]:
+            # Grow geometrically so repeated inserts stay amortized O(k)
+            capacity = max(16, self._neighbors.shape[0] * 2)
+            neighbors = np.full((capacity, self.k), -1, dtype=np.int32)
+            scores = np.full((capacity, self.k), -np.inf, dtype=np.float16)
+            neighbors[:row] = self._neighbors[:row]
+            scores[:row] = self._scores[:row]
+            self._neighbors, self._scores = neighbors, scores
+        self.ids.append(item_id)
+        self.id_to_row[item_id] = row
+        self._link(row, matrix)
+        return True
+
+    def _link(self, row: int, matrix: np.ndarray):
+        """Compute a row's neighbour list and insert it into other rows' lists."""
+        n = len(self.ids)
+        sims = matrix[:n] @ matrix[row]
+        sims[row] = -np.inf
+
+        kk = min(self.k, n - 1)
+        if kk <= 0:
+            return
+        top = np.argpartition(-sims, kk - 1)[:kk]
+        top = top[np.argsort(-sims[top], kind='stable')]
+        self.neighbors[row, :kk] = top
+        self.scores[row, :kk] = sims[top]
+
+        # Rows whose weakest neighbour is weaker than the new item
+        affected = np.nonzero(sims > self.scores[:n, -1].astype(np.float32))[0]
+        for other in affected:
+            if other == row:
+                continue
+            position = int(np.searchsorted(-self.scores[other].astype(np.float32), -sims[other], side='right'))
+            self.neighbors[other, position + 1:] = self.neighbors[other, position:-1].copy()
+            self.scores[other, position + 1:] = self.scores[other, position:-1].copy()
+            self.neighbors[other, position] = row
+            self.scores[other, position] = sims[other]
+
+    def lookup(self, item_id: str, top_k: int = 5, offset: int = 0,
+               exclude_ids: Optional[Iterable[str]] = None) -> Optional[List[Tuple[str, float]]]:
+        """
+        Return an item's precomputed neighbours.
+
+        Returns:
+            (item_id, similarity) pairs, or None when the stored list is too short
+            to fill the requested page after exclusions
+        """
+        row = self.id_to_row.get(item_id)
+        if row is None:
+            return None
+        excluded = set(exclude_ids or [])
+        results = []
+        for neighbor, score in zip(self.neighbors[row], self.scores[row]):
+            if neighbor < 0:
+                break
+            neighbor_id = self.ids[neighbor]
+            if neighbor_id not in excluded:
+                results.append((neighbor_id, float(score)))
+        if len(results) < offset + top_k and len(results) < len(self.ids) - 1 - len(excluded):
+            return None
+        return results[offset:offset + top_k]
@@ -0,0 +1,109 @@
+"""
+Prefix Index Module
+
+Sorted array of normalized title and author keys searched with bisect, for
+typeahead suggestions. Every word position of a title or name is also
+indexed, so "not taken" completes "The Road Not Taken" and "frost" completes
+"Robert Frost".
+"""
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import List, Dict, Any, Optional, Tuple
+
+
+def normalize_key(text: Optional[str]) -> str:
+    """Lowercase, strip accents and collapse punctuation/whitespace to single spaces."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r'[\W_]+', ' ', text.lower()).strip()
+
+
+class PrefixIndex:
+    """Typeahead index over item titles and author names."""
+
+    # Upper bound on keys examined per lookup, keeping short prefixes cheap
+    MAX_SCAN = 500
+
+    def __init__(self):
+        # Sorted (key, kind, normalized) tuples; the parallel _keys list is what bisect searches
+        self._keys: List[str] = []
+        self._entries: List[Tuple[str, str, str]] = []
+        # (kind, normalized) -> suggestion details
+        self._suggestions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._suggestions)
+
+    def _register(self, kind: str, display: Optional[str], item_id: str) -> List[Tuple[str, str, str]]:
+        """Record a title or name and return the sorted-array entries it needs (none if already known)."""
+        normalized = normalize_key(display)
+        if not normalized:
+            return []
+        suggestion = self._suggestions.get((kind, normalized))
+        if suggestion is not None:
+            suggestion['count'] += 1
+            return []
+
+        self._suggestions[(kind, normalized)] = {
+            'text': display.strip(),
+            'type': kind,
+            'item_id': item_id if kind == 'title' else None,
+            'count': 1
+        }
+        words = normalized.split(' ')
+        return [(' '.join(words[start:]), kind, normalized) for start in range(len(words))]
+
+    def add(self, item: Dict[str, Any]):
+        """Index an item's title and author."""
+        with self._lock:
+            for kind in ('title', 'author'):
+                for entry in self._register(kind, item.get(kind), item['id']):
+                    position = bisect_left(self._entries, entry)
+                    self._entries.insert(position, entry)
+                    self._keys.insert(position, entry[0])
+
+    def build(self, items: List[Dict[str, Any]]):
+        """Index many items at once, sorting a single time."""
+        with self._lock:
+            entries = list(self._entries)
+            for item in items:
+                for kind in ('title', 'author'):
+                    entries.extend(self._register(kind, item.get(kind), item['id']))
+            entries.sort()
+            self._entries = entries
+            self._keys = [entry[0] for entry in entries]
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """
+        Ranked completions for a prefix.
+
+        Completions that start with the prefix outrank ones matching a later
+        word; ties go to authors/titles with more items, then shorter text.
+        """
+        query = normalize_key(prefix)
+        if not query:
+            return []
+
+        candidates = {}
+        position = bisect_left(self._keys, query)
+        end = min(position + self.MAX_SCAN, len(self._keys))
+        while position < end and self._keys[position].startswith(query):
+            key, kind, normalized = self._entries[position]
+            whole = key == normalized
+            if candidates.get((kind, normalized)) is not True:
+                candidates[(kind, normalized)] = whole
+            position += 1
+
+        ranked = sorted(
+            candidates.items(),
+            key=lambda entry: (
+                not entry[1],
+                -self._suggestions[entry[0]]['count'],
+                len(entry[0][1])
+            )
+        )
+        return [dict(self._suggestions[key]) for key, _ in ranked[:limit]]
@@ -0,0 +1,41 @@
+"""
+Column Projections
+
+Named column lists for reads from the items and vibe_profiles tables. Only the
+vector projections fetch embeddings, so hot paths and API responses never
+carry the 1536-float vectors.
+"""
+
+ITEM_PROJECTIONS = {
+    # What a result card or list needs to render an item
+    'card': 'id, title, author, text, type, lang, curation_type',
+    # Every descriptive column, for single-item views such as /item/<id>
+    'full': 'id, title, author, text, type, year, lang, lines_count, tags, tag, semantic_tags, curation_type, source, created_at',
+    # Only the vector path fetches embeddings
+    'vector': 'id, embedding'
+}
+
+VIBE_PROFILE_PROJECTIONS = {
+    # Listing and membership, without the centroid vector
+    'summary': 'id, name, size, created_at, seed_item_ids',
+    # Centroid search
+    'vector': 'id, vector, seed_item_ids',
+    # Ranking profiles themselves by their centroids
+    'centroid': 'id, name, size, vector'
+}
+
+
+def item_fields(*names: str) -> str:
+    """Combine named item projections (and/or extra column names) into one select list."""
+    columns = []
+    for name in names:
+        for column in ITEM_PROJECTIONS.get(name, name).split(','):
+            column = column.strip()
+            if column and column not in columns:
+                columns.append(column)
+    return ', '.join(columns)
+
+
+def vibe_profile_fields(name: str) -> str:
+    """Select list for a named vibe profile projection."""
+    return VIBE_PROFILE_PROJECTIONS[name]
@@ -1,17 +1,30 @@
 """
 Clean Recommendation Engine Module
 
-This module provides simple keyword and semantic search functionality.
-No vectors, no top_k, no complexity.
+This module provides keyword and semantic search functionality. Semantic
+lookups are served from an in-memory vector index loaded at startup.
 """
 
 import os
 import json
 import re
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Union
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from .semantic_tagger import SemanticTagger
+from .vector_index import VectorIndex, Filters, fetch_item_embeddings, INDEX_SELECT_FIELDS
+from .ivf_index import IVFIndex
+from .embedding_cache import EmbeddingCache, normalize_text
+from .result_cache import ResultCache
+from .single_flight import SingleFlight
+from .neighbor_graph import NeighborGraph
+from .projections import item_fields
+from .keyword_index import KeywordIndex, utc_now
+from .tag_index import TagIndex, parse_structured_tags
+from .prefix_index import PrefixIndex
+from .trigram_index import TrigramIndex
+from utils.supabase_pagination import SupabasePagination
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +32,20 @@ load_dotenv()
 class ItemRecommendationEngine:
     """Simple engine for searching items (poems and quotes) using keyword and semantic search."""
     
+    # Reciprocal-rank fusion constant and hybrid candidate pool size (fixed per query,
+    # so every page slices the same ranking)
+    RRF_K = 60
+    HYBRID_POOL_SIZE = 200
+    
+    # Exact-phrase weights per field (title > author > text)
+    PHRASE_FIELD_WEIGHTS = {'title': 1.0, 'author': 0.9, 'text': 0.8}
+    
+    # Upper bound on items expanded from fuzzy author/title matches
+    FUZZY_MAX_ITEMS = 50
+    
+    # Tags are written by the offline run_tagging* scripts, so the tag index is rebuilt this often
+    TAG_INDEX_REFRESH_SECONDS = 3600
+    
     def __init__(self):
         # Initialize Supabase client
         self.supabase_url = os.getenv('SUPABASE_URL')
@@ -32,9 +59,135 @@ class ItemRecommendationEngine:
         from openai import OpenAI
         self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
         self.embedding_model = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
+        self.embedding_dim = int(os.getenv('EMBEDDING_DIM', '1536'))
+        
+        # Bounded cache for embeddings, with an on-disk tier shared by all workers
+        self.embedding_cache = EmbeddingCache(
+            model=self.embedding_model,
+            dim=self.embedding_dim,
+            max_bytes=int(os.getenv('EMBEDDING_CACHE_MAX_MB', '64')) * 1024 * 1024,
+            db_path=os.getenv('EMBEDDING_CACHE_PATH', 'data/embedding_cache.sqlite3'),
+            max_disk_rows=int(os.getenv('EMBEDDING_CACHE_MAX_DISK_ROWS', '50000'))
+        )
+        
+        # Ranked results of recent searches (shared with the vibe profile manager)
+        self.result_cache = ResultCache(
+            max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '1024')),
+            ttl_seconds=float(os.getenv('RESULT_CACHE_TTL_SECONDS', '300'))
+        )
+        
+        # Concurrent identical embedding calls and searches share one execution
+        self.single_flight = SingleFlight()
+        
+        # In-memory vector index over every item embedding
+        self.vector_index = VectorIndex(dim=self.embedding_dim)
+        self.embedding_snapshot_path = os.getenv('EMBEDDING_SNAPSHOT_PATH', 'data/embeddings.npy')
+        self.ivf_index_path = os.getenv('IVF_INDEX_PATH', 'data/ivf_centroids.npz')
+        self._load_vector_index()
         
-        # Cache for embeddings
-        self.embeddings_cache = {}
+        # Precomputed item-to-item neighbours (built offline by scripts/build_neighbor_graph.py)
+        self.neighbor_graph_path = os.getenv('NEIGHBOR_GRAPH_PATH', 'data/neighbor_graph.npz')
+        self._load_neighbor_graph()
+        
+        # In-process BM25 keyword index, restored from its snapshot when available
+        self.keyword_index_path = os.getenv('KEYWORD_INDEX_PATH', 'data/keyword_index.pkl')
+        self.keyword_index = KeywordIndex()
+        self._load_keyword_index()
+        
+        # Sparse item x tag relevance matrix for tag-based search, built on first use
+        self.tag_index = None
+        self._tag_index_loaded_at = 0.0
+        
+        # Typeahead and typo-tolerant matching over titles and author names
+        self.prefix_index = PrefixIndex()
+        self.trigram_index = TrigramIndex()
+        self._load_title_author_indexes()
+    
+    def _load_vector_index(self):
+        """Map the embedding snapshot (scripts/export_embedding_snapshot.py) or load every embedding from the database."""
+        try:
+            if os.path.exists(self.embedding_snapshot_path):
+                self._load_vector_snapshot()
+            else:
+                self.vector_index.build(fetch_item_embeddings(self.supabase))
+                print(f"Loaded {len(self.vector_index)} item embeddings into the vector index")
+            if len(self.vector_index) >= int(os.getenv('IVF_MIN_ITEMS', '100000')):
+                self._load_ivf_index()
+            if os.getenv('VECTOR_INDEX_QUANTIZE', 'false').lower() == 'true':
+                quantizer = self.vector_index.enable_quantization(
+                    rerank=int(os.getenv('VECTOR_INDEX_RERANK', '300'))
+                )
+                print(f"Quantized vector index to {quantizer.nbytes / 2**20:.1f} MB "
+                      f"(recall@{quantizer.recall['k']}: {quantizer.recall['recall']:.3f})")
+            workers = int(os.getenv('VECTOR_SEARCH_WORKERS', '0'))
+            if workers > 0 and len(self.vector_index) > 0:
+                self.vector_index.enable_sharding(workers)
+                print(f"Sharded vector search across {len(self.vector_index.shards)} worker processes")
+        except Exception as e:
+            print(f"Error loading vector index: {e}")
+    
+    def _load_vector_snapshot(self):
+        """
+        Map the embedding snapshot and catch up on rows changed since it was written.
+
+        Rows count as changed by updated_at (kept current by
+        add_items_updated_at_trigger.sql), which covers new items as well as
+        embeddings filled in or regenerated on existing ones. If the snapshot
+        cannot be loaded, the catch-up fails, or the index still disagrees with
+        the database's count of embedded items (e.g. deletions), the index is
+        rebuilt from the database and the snapshot re-exported.
+        """
+        try:
+            built_at = self.vector_index.load_snapshot(self.embedding_snapshot_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading embedding snapshot: {e}")
+            self._rebuild_vector_snapshot()
+            return
+        try:
+            pagination = SupabasePagination(self.supabase, 'items')
+            changed = pagination.get_all_records_list(
+                select_fields=INDEX_SELECT_FIELDS,
+                filters={'embedding_not_is': 'null', 'updated_at_gt': built_at},
+                order_by='updated_at',
+                order_desc=False
+            )
+            for item in changed:
+                self.vector_index.add(item['id'], item.get('embedding'), item)
+            embedded = self.supabase.table('items').select('id', count='exact').not_.is_('embedding', 'null').limit(1).execute().count
+        except Exception as e:
+            print(f"Error catching up embedding snapshot: {e}")
+            changed, embedded = [], None
+
+        # Rows with an unusable embedding are counted by the database but not indexed
+        indexed = len(self.vector_index) + len(self.vector_index.skipped_ids)
+        if embedded == indexed:
+            print(f"Mapped {len(self.vector_index)} item embeddings from {self.embedding_snapshot_path} "
+                  f"({len(changed)} changed since the snapshot)")
+            return
+
+        print(f"Embedding snapshot is stale ({indexed} items indexed or skipped, {embedded} embedded); rebuilding")
+        self._rebuild_vector_snapshot()
+
+    def _rebuild_vector_snapshot(self):
+        """Load every embedding from the database and re-export the snapshot."""
+        rebuilt_at = utc_now()
+        self.vector_index.build(fetch_item_embeddings(self.supabase))
+        self.vector_index.save_snapshot(self.embedding_snapshot_path, built_at=rebuilt_at)
+        print(f"Loaded {len(self.vector_index)} item embeddings and re-exported {self.embedding_snapshot_path}")
+    
+    def _load_ivf_index(self):
+        """Attach IVF inverted lists (centroids from scripts/train_ivf_index.py)."""
+        if not os.path.exists(self.ivf_index_path):
+            print(f"No IVF centroids at {self.ivf_index_path}, using brute-force search "
+                  f"(run scripts/train_ivf_index.py)")
+            return
+        try:
+            nprobe = int(os.getenv('IVF_NPROBE', '8'))
+            ivf = IVFIndex.load(self.ivf_index_path, nprobe)
+            self.vector_index.enable_ivf(ivf)
+            print(f"Loaded IVF index with {ivf.nlist} lists (nprobe={ivf.nprobe})")
+        except Exception as e:
+            print(f"Error loading IVF index: {e}")
     
     def get_embedding(self, text: str) -> List[float]:
         """
@@ -47,9 +200,15 @@ class ItemRecommendationEngine:
             List[float]: Embedding vector
         """
         # Check cache first
-        if text in self.embeddings_cache:
-            return self.embeddings_cache[text]
+        cached = self.embedding_cache.get(text)
+        if cached is not None:
+            return cached
         
+        # Identical texts requested at the same time make one API call
+        return self.single_flight.do(('embedding', self.embedding_cache.key(text)), self._create_embedding, text)
+    
+    def _create_embedding(self, text: str) -> List[float]:
+        """Call the OpenAI embeddings API and cache the result."""
         try:
             response = self.openai_client.embeddings.create(
                 model=self.embedding_model,
@@ -58,103 +217,472 @@ class ItemRecommendationEngine:
             embedding = response.data[0].embedding
             
             # Cache the embedding
-            self.embeddings_cache[text] = embedding
+            self.embedding_cache.put(text, embedding)
             return embedding
             
         except Exception as e:
             print(f"Error generating embedding: {e}")
             return []
         
-    def search_items(self, query: str) -> List[Dict[str, Any]]:
+    def search_items(self, query: str, top_k: int = 5, offset: int = 0,
+                     exclude_ids: Optional[List[str]] = None,
+                     filters: Optional[Filters] = None) -> List[Dict[str, Any]]:
         """
-        Search items (poems and quotes) using keyword search for quoted phrases and semantic search for natural language.
+        Search items (poems and quotes) with a hybrid of exact-phrase and embedding search.
+        
+        Quoted phrases and natural language are both matched against one candidate
+        pool (the embedding's nearest items plus exact matches for quoted phrases),
+        ranked separately and combined with reciprocal-rank fusion. Past the end of
+        the pool, results continue in embedding order.
+        
+        The pool does not depend on the page, so consecutive pages never overlap
+        or skip items, and only the first offset + top_k results are materialized.
+        Ranked lists are cached per normalized query, so reloads and earlier pages
+        are served from memory until add_item changes the corpus.
         
         Args:
             query (str): Search query
+            top_k (int): Maximum number of results to return
+            offset (int): Number of leading results to skip
+            exclude_ids (List[str]): Item IDs to leave out of the results
+            filters (Dict): Restrict results by type, curation_type, author and/or lang
             
         Returns:
-            List[Dict]: List of matching items
+            List[Dict]: One page of matching items, best first
         """
+        limit = offset + top_k
+        excluded = set(exclude_ids or [])
+        key = ('search', normalize_text(query), json.dumps(filters or {}, sort_keys=True), tuple(sorted(excluded)))
+        
+        # A cached ranking serves any page it covers (or all of them, if it ran out of results)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            ranked_limit, ranked = cached
+            if ranked_limit >= limit or len(ranked) < ranked_limit:
+                return [dict(result) for result in ranked[offset:limit]]
+        
+        ranked = self.single_flight.do(key + (limit,), self._rank_items, query, limit, excluded, filters)
+        if ranked:
+            self.result_cache.put(key, (limit, ranked))
+        return [dict(result) for result in ranked[offset:limit]]
+    
+    def _rank_items(self, query: str, limit: int, excluded: set,
+                    filters: Optional[Filters] = None) -> List[Dict[str, Any]]:
+        """The best `limit` hybrid search results for a query (see search_items)."""
         # Extract quoted phrases and natural language parts
-        quoted_phrases = re.findall(r'"([^"]*)"', query)
+        quoted_phrases = [p.strip() for p in re.findall(r'"([^"]*)"', query) if p.strip()]
         natural_language = re.sub(r'"[^"]*"', '', query).strip()
         
-        all_results = []
+        embedding = []
+        if len(self.vector_index) > 0:
+            embedding = self.get_embedding(natural_language or ' '.join(quoted_phrases) or query)
+        
+        # Fall back to keyword-only search when the embedding stage is unavailable
+        if not embedding:
+            results = self._search_items_by_keywords(query, quoted_phrases, natural_language,
+                                                     None if filters else limit + len(excluded))
+            return [r for r in results if r['item']['id'] not in excluded
+                    and self.vector_index.matches_filters(r['item'], filters)][:limit]
+        
+        # 1. Embedding stage: nearest items (within the filtered subset) form the candidate pool
+        pool_size = self.HYBRID_POOL_SIZE
+        pool = {result['item']['id']: result
+                for result in self.search_by_embedding(embedding, pool_size, exclude_ids=excluded, filters=filters)}
         
-        # 1. Keyword search for quoted phrases (exact matches)
+        # Quoted phrases are explicit exact-match requests, so their hits join the pool
         if quoted_phrases:
-            for phrase in quoted_phrases:
-                keyword_results = self._search_by_keywords(phrase)
-                all_results.extend(keyword_results)
-        
-        # 2. Keyword search for natural language (fallback to keyword search)
-        if natural_language:
-            keyword_results = self._search_by_keywords(natural_language)
-            all_results.extend(keyword_results)
-        
-        # 3. Fallback: if no natural language, do keyword search on the whole query
-        if not natural_language and not quoted_phrases:
-            keyword_results = self._search_by_keywords(query)
-            all_results.extend(keyword_results)
-        
-        # Remove duplicates and sort by relevance
-        unique_results = {}
-        for result in all_results:
-            item_id = result['item']['id']
-            if item_id not in unique_results or unique_results[item_id]['similarity'] < result['similarity']:
-                unique_results[item_id] = result
-        
-        # Return all results sorted by similarity
-        final_results = list(unique_results.values())
-        final_results.sort(key=lambda x: x['similarity'], reverse=True)
+            for result in self._search_by_keywords(quoted_phrases, limit=pool_size):
+                if result['item']['id'] in excluded or not self.vector_index.matches_filters(result['item'], filters):
+                    continue
+                pool.setdefault(result['item']['id'], {
+                    'item': result['item'],
+                    'similarity': 0.0,
+                    'match_type': result['match_type']
+                })
+        
+        missing_scores = self.vector_index.similarities(
+            embedding, [item_id for item_id, result in pool.items() if result['similarity'] == 0.0]
+        )
+        for item_id, similarity in missing_scores.items():
+            pool[item_id]['similarity'] = similarity
+        
+        semantic_ranking = sorted(pool, key=lambda item_id: pool[item_id]['similarity'], reverse=True)
+        
+        # 2. Exact-phrase stage over the same pool
+        phrases = quoted_phrases or [natural_language or query]
+        phrase_scores = {item_id: self._phrase_match_score(result['item'], phrases) for item_id, result in pool.items()}
+        phrase_ranking = sorted(
+            (item_id for item_id in semantic_ranking if phrase_scores[item_id] > 0),
+            key=lambda item_id: phrase_scores[item_id],
+            reverse=True
+        )
+        
+        # 3. Reciprocal-rank fusion of both rankings
+        fused = {}
+        for ranking in (semantic_ranking, phrase_ranking):
+            for rank, item_id in enumerate(ranking):
+                fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (self.RRF_K + rank + 1)
+        
+        final_results = []
+        for item_id in sorted(fused, key=fused.get, reverse=True)[:limit]:
+            result = pool[item_id]
+            final_results.append({
+                'item': result['item'],
+                'similarity': result['similarity'],
+                'score': fused[item_id],
+                'match_type': 'hybrid' if phrase_scores[item_id] > 0 else result.get('match_type', 'semantic')
+            })
+        
+        # 4. Deeper pages continue with the embedding ranking of everything outside the pool
+        if len(final_results) < limit:
+            final_results.extend(self.search_by_embedding(
+                embedding, limit - len(final_results), exclude_ids=excluded | set(pool), filters=filters
+            ))
         return final_results
     
-    def search_by_keywords(self, keywords: str) -> List[Dict[str, Any]]:
+    def _search_items_by_keywords(self, query: str, quoted_phrases: List[str], natural_language: str,
+                                  limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Keyword-only search over quoted phrases and natural language, best `limit` results."""
+        # All quoted phrases and the natural language part go out in a single ranked call;
+        # with neither, search the whole query
+        phrases = quoted_phrases + ([natural_language] if natural_language else [])
+        return self._search_by_keywords(phrases or [query], limit=limit)
+    
+    def _phrase_match_score(self, item: Dict[str, Any], phrases: List[str]) -> float:
+        """Field-weighted count of exact (case-insensitive) phrase occurrences in an item."""
+        score = 0.0
+        for phrase in phrases:
+            phrase = phrase.lower()
+            if not phrase:
+                continue
+            for field, weight in self.PHRASE_FIELD_WEIGHTS.items():
+                if phrase in (item.get(field) or '').lower():
+                    score += weight
+        return score
+    
+    def _load_neighbor_graph(self):
+        """Load the precomputed neighbour graph and align it with the vector index."""
+        if not os.path.exists(self.neighbor_graph_path):
+            return
+        try:
+            graph = self.vector_index.enable_neighbor_graph(NeighborGraph.load(self.neighbor_graph_path))
+            print(f"Loaded neighbour graph for {len(graph)} items")
+        except Exception as e:
+            print(f"Error loading neighbour graph: {e}")
+    
+    def _load_keyword_index(self):
+        """Restore the keyword index snapshot and catch up on newer items, or build it from scratch."""
+        try:
+            pagination = SupabasePagination(self.supabase, 'items')
+            # Taken before fetching: rows inserted mid-fetch are caught up on the next start
+            fetch_started_at = utc_now()
+            index = None
+            if os.path.exists(self.keyword_index_path):
+                try:
+                    index = KeywordIndex.load(self.keyword_index_path)
+                except ValueError as e:
+                    # Snapshot from an older version: rebuild it below
+                    print(f"Rebuilding keyword index: {e}")
+            if index is not None:
+                newer = pagination.get_all_records_list(
+                    select_fields=item_fields('card'),
+                    filters={'created_at_gt': index.built_at},
+                    order_by='created_at',
+                    order_desc=False
+                )
+                for item in newer:
+                    index.add(item)
+                if newer:
+                    index.built_at = fetch_started_at
+                    index.save(self.keyword_index_path)
+            else:
+                index = KeywordIndex()
+                index.build(pagination.get_all_records_list(
+                    select_fields=item_fields('card'),
+                    order_by='id',
+                    order_desc=False
+                ), built_at=fetch_started_at)
+                index.save(self.keyword_index_path)
+            self.keyword_index = index
+            print(f"Loaded keyword index over {len(self.keyword_index)} items")
+        except Exception as e:
+            print(f"Error loading keyword index: {e}")
+    
+    def _load_tag_index(self) -> TagIndex:
+        """Sparse tag index over every item's semantic tags, rebuilt when older than TAG_INDEX_REFRESH_SECONDS."""
+        if self.tag_index is not None and \
+                time.monotonic() - self._tag_index_loaded_at < self.TAG_INDEX_REFRESH_SECONDS:
+            return self.tag_index
+        return self.single_flight.do(('tag_index',), self._build_tag_index)
+    
+    def _build_tag_index(self) -> TagIndex:
+        """Parse every item's semantic tags into a new tag index."""
+        pagination = SupabasePagination(self.supabase, 'items')
+        index = TagIndex()
+        index.build(pagination.get_all_records_list(
+            select_fields='id, semantic_tags',
+            filters={'semantic_tags_not_is': 'null'},
+            order_by='id',
+            order_desc=False
+        ))
+        print(f"Loaded tag index over {len(index)} items and {len(index.tags)} tags")
+        self.tag_index = index
+        self._tag_index_loaded_at = time.monotonic()
+        return index
+    
+    def _load_title_author_indexes(self):
+        """Build the typeahead and trigram indexes from every item's title and author."""
+        try:
+            # The keyword index already holds every title and author; scan only if it failed to load
+            if len(self.keyword_index) > 0:
+                items = self.keyword_index.documents()
+            else:
+                pagination = SupabasePagination(self.supabase, 'items')
+                items = pagination.get_all_records_list(
+                    select_fields='id, title, author',
+                    order_by='id',
+                    order_desc=False
+                )
+            self.prefix_index.build(items)
+            self.trigram_index.build(items)
+            print(f"Loaded prefix and trigram indexes with {len(self.prefix_index)} titles and authors")
+        except Exception as e:
+            print(f"Error loading title/author indexes: {e}")
+    
+    def _get_cards(self, item_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Card data for items, from the vector index where possible and one query for the rest."""
+        cards = {}
+        missing = []
+        for item_id in item_ids:
+            card = self.vector_index.get_item(item_id)
+            if card is not None:
+                cards[item_id] = card
+            else:
+                missing.append(item_id)
+        if missing:
+            try:
+                result = self.supabase.table('items').select(item_fields('card')).in_('id', missing).execute()
+                for item in (result.data or []):
+                    cards[item['id']] = item
+            except Exception as e:
+                print(f"Error fetching item cards: {e}")
+        return cards
+    
+    def search_by_embedding(self, embedding: List[float], top_k: int = 5, offset: int = 0,
+                            exclude_ids: Optional[List[str]] = None,
+                            filters: Optional[Filters] = None) -> List[Dict[str, Any]]:
+        """
+        Find the items nearest to an embedding using the in-memory vector index.
+        
+        Args:
+            embedding (List[float]): Query embedding
+            top_k (int): Number of results to return
+            offset (int): Number of leading results to skip
+            exclude_ids (List[str]): Item IDs to leave out of the results
+            filters (Dict): Restrict results by type, curation_type, author and/or lang;
+                only the matching subset of the index is scored
+            
+        Returns:
+            List[Dict]: List of items with cosine similarity scores
+        """
+        matches = self.vector_index.search(embedding, top_k, offset, exclude_ids, filters)
+        return [{
+            'item': self.vector_index.get_item(item_id),
+            'similarity': similarity,
+            'match_type': 'semantic'
+        } for item_id, similarity in matches]
+    
+    def get_item_embedding(self, item_id: str) -> Optional[List[float]]:
+        """Return an item's stored embedding, from the vector index or the database."""
+        vector = self.vector_index.get_vector(item_id)
+        if vector is not None:
+            return vector
+        try:
+            result = self.supabase.table('items').select(item_fields('vector')).eq('id', item_id).execute()
+            if result.data and result.data[0].get('embedding'):
+                embedding = result.data[0]['embedding']
+                return json.loads(embedding) if isinstance(embedding, str) else embedding
+            return None
+        except Exception as e:
+            print(f"Error getting item embedding: {e}")
+            return None
+    
+    def find_similar_items(self, item_id: str, top_k: int = 5, offset: int = 0,
+                           exclude_ids: Optional[List[str]] = None,
+                           filters: Optional[Filters] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find the nearest neighbours of an item using its stored embedding.
+        
+        Args:
+            item_id (str): ID of the item to find neighbours for
+            top_k (int): Number of results to return
+            offset (int): Number of leading results to skip
+            exclude_ids (List[str]): Additional item IDs to leave out
+            filters (Dict): Restrict results by type, curation_type, author and/or lang
+            
+        Returns:
+            List[Dict]: Similar items, or None if the item has no embedding
+        """
+        excluded = set(exclude_ids or [])
+        
+        # Constant-time answer from the precomputed graph when it covers the (unfiltered) page
+        neighbor_graph = self.vector_index.neighbor_graph
+        if neighbor_graph is not None and not filters:
+            neighbors = neighbor_graph.lookup(item_id, top_k, offset, excluded)
+            if neighbors is not None:
+                return [{
+                    'item': self.vector_index.get_item(neighbor_id),
+                    'similarity': similarity,
+                    'match_type': 'semantic'
+                } for neighbor_id, similarity in neighbors if neighbor_id in self.vector_index]
+        
+        embedding = self.get_item_embedding(item_id)
+        if embedding is None:
+            return None
+        excluded.add(item_id)
+        return self.search_by_embedding(embedding, top_k, offset, excluded, filters)
+    
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """
+        Typeahead completions over titles and author names.
+        
+        Args:
+            prefix (str): What the user has typed so far
+            limit (int): Maximum number of suggestions
+            
+        Returns:
+            List[Dict]: Suggestions with 'text', 'type' ('title' or 'author'), 'item_id' and 'count'
+        """
+        return self.prefix_index.suggest(prefix, limit)
+    
+    def search_by_keywords(self, keywords: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """Search items by keywords in title, author, or text."""
-        return self._search_by_keywords(keywords)
+        return self._search_by_keywords(keywords, limit, offset)
+    
+    def _search_by_keywords(self, keywords: Union[str, List[str]], limit: Optional[int] = None,
+                            offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Search poems by phrase matching in title, author, and text with one ranked full-text call.
+        
+        Args:
+            keywords (str | List[str]): Phrase, or several phrases matched in the same call
+            limit (int): Maximum number of results to return (None for all)
+            offset (int): Number of leading results to skip
+            
+        Returns:
+            List[Dict]: List of matching poems with relevance scores, best first
+        """
+        phrases = [keywords] if isinstance(keywords, str) else list(keywords)
+        phrases = [phrase.strip() for phrase in phrases if phrase and phrase.strip()]
+        if not phrases:
+            return []
+        
+        # Served locally from the BM25 index when it is loaded
+        if len(self.keyword_index) > 0:
+            matches = self.keyword_index.search(phrases, limit, offset)
+            cards = self._get_cards([item_id for item_id, _, _ in matches])
+            results = [{
+                'item': cards[item_id],
+                'similarity': score,
+                'match_type': field
+            } for item_id, score, field in matches if item_id in cards]
+        else:
+            try:
+                # All phrases and fields ranked server-side (see add_fulltext_search.sql)
+                matches = self.supabase.rpc('search_items_fulltext', {
+                    'phrases': phrases,
+                    'match_count': limit,
+                    'match_offset': offset
+                }).execute()
+                
+                results = [{
+                    'item': {k: v for k, v in row.items() if k not in ('rank', 'match_type')},
+                    'similarity': float(row.get('rank') or 0.0),
+                    'match_type': row.get('match_type', 'text')
+                } for row in (matches.data or [])]
+                
+            except Exception as e:
+                print(f"Full-text search failed, falling back to ilike scans: {e}")
+                results = self._search_by_keywords_ilike(phrases, limit, offset)
+        
+        # Nothing matched exactly: try typo-tolerant author and title matches
+        if not results and offset == 0:
+            results = self._search_by_fuzzy_match(phrases, limit)
+        return results
     
-    def _search_by_keywords(self, keywords: str) -> List[Dict[str, Any]]:
+    def _search_by_fuzzy_match(self, phrases: List[str], limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Search poems by exact keyword matching in title, author, and text.
+        Match possibly misspelled author names and titles by trigram similarity.
         
         Args:
-            keywords (str): Keywords to search for
+            phrases (List[str]): Phrases to match
+            limit (int): Maximum number of items to return (None for FUZZY_MAX_ITEMS)
             
         Returns:
-            List[Dict]: List of matching poems with relevance scores
+            List[Dict]: Items of the closest authors/titles, ranked by similarity
         """
+        limit = limit or self.FUZZY_MAX_ITEMS
+        matches = []
+        for phrase in phrases:
+            matches.extend(self.trigram_index.search(phrase, limit=limit))
+        matches.sort(key=lambda entry: entry['similarity'], reverse=True)
+        
+        ranked = {}
+        for entry in matches:
+            for item_id in entry['item_ids']:
+                if item_id not in ranked and len(ranked) < limit:
+                    ranked[item_id] = (entry['similarity'], f"fuzzy_{entry['type']}")
+        
+        cards = self._get_cards(list(ranked))
+        return [{
+            'item': cards[item_id],
+            'similarity': similarity,
+            'match_type': match_type
+        } for item_id, (similarity, match_type) in ranked.items() if item_id in cards]
+    
+    def _search_by_keywords_ilike(self, phrases: List[str], limit: Optional[int] = None,
+                                  offset: int = 0) -> List[Dict[str, Any]]:
+        """Fallback keyword search using ilike substring scans per phrase and field."""
         try:
             results = []
             
-            # Search in title
-            title_matches = self.supabase.table('items').select('*').ilike('title', f'%{keywords}%').execute()
-            if title_matches.data:
-                for item in title_matches.data:
-                    results.append({
-                        'item': item,
-                        'similarity': 1.0,  # High relevance for title matches
-                        'match_type': 'title'
-                    })
-            
-            # Search in author
-            author_matches = self.supabase.table('items').select('*').ilike('author', f'%{keywords}%').execute()
-            if author_matches.data:
-                for item in author_matches.data:
-                    results.append({
-                        'item': item,
-                        'similarity': 0.9,  # High relevance for author matches
-                        'match_type': 'author'
-                    })
+            def field_matches(field: str, keywords: str):
+                query = self.supabase.table('items').select(item_fields('card')).ilike(field, f'%{keywords}%')
+                # Each field only needs to contribute its first offset + limit rows
+                if limit is not None:
+                    query = query.limit(offset + limit)
+                return query.execute()
             
-            # Search in text
-            text_matches = self.supabase.table('items').select('*').ilike('text', f'%{keywords}%').execute()
-            if text_matches.data:
-                for item in text_matches.data:
-                    results.append({
-                        'item': item,
-                        'similarity': 0.8,  # Lower relevance for text matches
-                        'match_type': 'text'
-                    })
+            for keywords in phrases:
+                # Search in title
+                title_matches = field_matches('title', keywords)
+                if title_matches.data:
+                    for item in title_matches.data:
+                        results.append({
+                            'item': item,
+                            'similarity': 1.0,  # High relevance for title matches
+                            'match_type': 'title'
+                        })
+                
+                # Search in author
+                author_matches = field_matches('author', keywords)
+                if author_matches.data:
+                    for item in author_matches.data:
+                        results.append({
+                            'item': item,
+                            'similarity': 0.9,  # High relevance for author matches
+                            'match_type': 'author'
+                        })
+                
+                # Search in text
+                text_matches = field_matches('text', keywords)
+                if text_matches.data:
+                    for item in text_matches.data:
+                        results.append({
+                            'item': item,
+                            'similarity': 0.8,  # Lower relevance for text matches
+                            'match_type': 'text'
+                        })
             
             # Remove duplicates and sort by relevance
             unique_results = {}
@@ -163,21 +691,25 @@ class ItemRecommendationEngine:
                 if item_id not in unique_results or unique_results[item_id]['similarity'] < result['similarity']:
                     unique_results[item_id] = result
             
-            # Sort by similarity and return all results
+            # Sort by similarity and return the requested page
             final_results = list(unique_results.values())
             final_results.sort(key=lambda x: x['similarity'], reverse=True)
-            return final_results
+            if limit is None:
+                return final_results[offset:]
+            return final_results[offset:offset + limit]
             
         except Exception as e:
             print(f"Error in keyword search: {e}")
             return []
     
-    def _search_by_semantic_similarity(self, query_text: str) -> List[Dict[str, Any]]:
+    def _search_by_semantic_similarity(self, query_text: str, top_k: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """
         Search poems using semantic similarity based on tags.
         
         Args:
             query_text (str): Query text to search for
+            top_k (int): Number of results to return
+            offset (int): Number of leading results to skip
             
         Returns:
             List[Dict]: List of similar poems with similarity scores
@@ -187,11 +719,28 @@ class ItemRecommendationEngine:
             query_tags = self.tagger.get_search_tags(query_text)
             print(f"Search tags for '{query_text}': {query_tags}")
             
+            # One sparse mat-vec over the pre-parsed tag matrix
+            try:
+                tag_index = self._load_tag_index()
+            except Exception as e:
+                print(f"Error loading tag index: {e}")
+                tag_index = None
+            if tag_index is not None and len(tag_index) > 0:
+                matches = tag_index.search(query_tags, top_k, offset)
+                cards = self._get_cards([item_id for item_id, _, _ in matches])
+                return [{
+                    'item': cards[item_id],
+                    'similarity': similarity,
+                    'match_type': 'semantic',
+                    'matched_tags': matched_tags
+                } for item_id, similarity, matched_tags in matches if item_id in cards]
+            
+            # Fallback: one contains() query per tag, scored row by row
             # Search items that have any of the query tags
             results = []
             for tag in query_tags:
                 # Use PostgreSQL array contains operator to find items with this tag
-                items_result = self.supabase.table('items').select('*').contains('semantic_tags', [tag]).execute()
+                items_result = self.supabase.table('items').select(item_fields('card', 'semantic_tags')).contains('semantic_tags', [tag]).execute()
                 
                 if items_result.data:
                     for item in items_result.data:
@@ -218,10 +767,10 @@ class ItemRecommendationEngine:
                 if item_id not in unique_results or unique_results[item_id]['similarity'] < result['similarity']:
                     unique_results[item_id] = result
             
-            # Sort by similarity and return all results
+            # Sort by similarity and return the requested page
             final_results = list(unique_results.values())
             final_results.sort(key=lambda x: x['similarity'], reverse=True)
-            return final_results
+            return final_results[offset:offset + top_k]
             
         except Exception as e:
             print(f"Error in keyword search: {e}")
@@ -229,31 +778,7 @@ class ItemRecommendationEngine:
     
     def _parse_structured_tags(self, tags_array: List[str]) -> Dict[str, List[Dict[str, float]]]:
         """Parse structured tags from the database array."""
-        structured_tags = {
-            "emotions": [],
-            "themes": [],
-            "imagery": [],
-            "style": []
-        }
-        
-        for tag_string in tags_array:
-            try:
-                import json
-                if tag_string.startswith('{') and tag_string.endswith('}'):
-                    # This is a structured tag
-                    tag_data = json.loads(tag_string)
-                    for category in structured_tags.keys():
-                        if category in tag_data and isinstance(tag_data[category], list):
-                            structured_tags[category].extend(tag_data[category])
-                else:
-                    # This is a simple string tag - convert to structured format
-                    # Add to themes category with medium relevance
-                    structured_tags["themes"].append({"tag": tag_string, "relevance": 0.5})
-            except (json.JSONDecodeError, TypeError):
-                # Invalid JSON or not a string - skip
-                continue
-        
-        return structured_tags
+        return parse_structured_tags(tags_array)
     
     def _calculate_structured_similarity(self, query_tags: List[str], structured_tags: Dict[str, List[Dict[str, float]]]) -> tuple[float, List[str]]:
         """Calculate similarity between query tags and structured item tags."""
@@ -293,7 +818,7 @@ class ItemRecommendationEngine:
             Dict: Item data or None if not found
         """
         try:
-            result = self.supabase.table('items').select('*').eq('id', item_id).execute()
+            result = self.supabase.table('items').select(item_fields('full')).eq('id', item_id).execute()
             if result.data:
                 return result.data[0]
             return None
@@ -341,6 +866,25 @@ class ItemRecommendationEngine:
             
             if result.data and len(result.data) > 0:
                 item_id = result.data[0]['id']
+                self.vector_index.add(item_id, embedding, {
+                    'id': item_id,
+                    'title': title,
+                    'author': author,
+                    'text': text,
+                    'type': item_type
+                })
+                if self.tag_index is not None:
+                    self.tag_index.add(item_id, tags_array)
+                self.prefix_index.add({'id': item_id, 'title': title, 'author': author})
+                self.trigram_index.add({'id': item_id, 'title': title, 'author': author})
+                self.keyword_index.add({
+                    'id': item_id,
+                    'title': title,
+                    'author': author,
+                    'text': text
+                })
+                # Any cached ranking could now be missing this item
+                self.result_cache.clear()
                 print(f"Successfully added {item_type}: {title} by {author} (ID: {item_id})")
                 return item_id
             else:
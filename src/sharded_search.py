@@ -0,0 +1,157 @@
+"""
+Sharded Vector Search Module
+
+Spreads brute-force scoring of the embedding matrix over worker processes.
+Workers are forked, so each reads its contiguous block of rows straight from
+the matrix it inherited (the same physical pages, including a memory-mapped
+snapshot's), answers top-k queries for it over a pipe, and the coordinator
+merges the partial results. Rows the owning process overwrites afterwards are
+invisible to the workers, so they are tracked and scored by the coordinator.
+"""
+
+import atexit
+import multiprocessing
+import threading
+import numpy as np
+from typing import List, Optional, Tuple
+
+
+def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, unordered."""
+    if k < scores.shape[0]:
+        return np.argpartition(-scores, k - 1)[:k]
+    return np.arange(scores.shape[0])
+
+
+def _shard_worker(shard: np.ndarray, start: int, conn):
+    """Serve top-k queries over a block of rows starting at start until told to stop."""
+    try:
+        while True:
+            request = conn.recv()
+            if request is None:
+                break
+            query, k, rows = request
+            if rows is None:
+                scores = shard @ query
+                top = _top_rows(scores, k)
+                conn.send((top + start, scores[top]))
+            else:
+                scores = shard[rows - start] @ query
+                top = _top_rows(scores, k)
+                conn.send((rows[top], scores[top]))
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+
+class ShardedSearch:
+    """Scatter-gather top-k over a matrix split across worker processes."""
+
+    def __init__(self, matrix: np.ndarray, workers: int = 4):
+        n, dim = matrix.shape
+        self.size = n
+        self.dim = dim
+        # Sorted rows changed since the fork; replaced wholesale so readers need no lock
+        self.stale = np.zeros(0, dtype=np.int64)
+
+        # Fork so workers share the matrix pages copy-on-write instead of receiving a copy
+        context = multiprocessing.get_context('fork')
+        workers = max(1, min(workers, n))
+        bounds = np.linspace(0, n, workers + 1).astype(int)
+        self.bounds = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        self._connections = []
+        self._processes = []
+        # One lock per pipe; queries take them in shard order, so they pipeline without deadlock
+        self._locks: List[threading.Lock] = []
+        for start, end in self.bounds:
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_shard_worker,
+                args=(matrix[start:end], start, child),
+                daemon=True
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+            self._locks.append(threading.Lock())
+        self._closed = False
+        atexit.register(self.close)
+
+    def __len__(self) -> int:
+        return len(self._processes)
+
+    def set(self, row: int):
+        """Note that a sharded row was overwritten, so its worker copy must not be trusted."""
+        if row < self.size and row not in self.stale:
+            self.stale = np.insert(self.stale, np.searchsorted(self.stale, row), row)
+
+    def search(self, query: np.ndarray, k: int,
+               rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k rows over every shard.
+
+        Args:
+            query: L2-normalized query vector
+            k: Number of rows to return
+            rows: Restrict scoring to these rows (sorted); rows past the sharded
+                range are ignored
+
+        Returns:
+            Tuple of row indices and their scores, unordered. Rows in stale are
+            left out and must be scored by the caller.
+        """
+        query = np.ascontiguousarray(query, dtype=np.float32)
+        stale = self.stale
+        # Ask for extra rows so dropping stale ones cannot leave a shard short
+        k += stale.shape[0]
+        sent = []
+        try:
+            for (start, end), connection, lock in zip(self.bounds, self._connections, self._locks):
+                shard_rows = None
+                if rows is not None:
+                    shard_rows = rows[np.searchsorted(rows, start):np.searchsorted(rows, end)]
+                    if shard_rows.shape[0] == 0:
+                        continue
+                lock.acquire()
+                sent.append((connection, lock))
+                connection.send((query, k, shard_rows))
+
+            partial_rows, partial_scores = [], []
+            while sent:
+                connection, lock = sent.pop(0)
+                try:
+                    shard_top, shard_scores = connection.recv()
+                finally:
+                    lock.release()
+                partial_rows.append(shard_top)
+                partial_scores.append(shard_scores)
+        finally:
+            for _, lock in sent:
+                lock.release()
+
+        if not partial_rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        merged_rows = np.concatenate(partial_rows)
+        merged_scores = np.concatenate(partial_scores)
+        if stale.shape[0]:
+            fresh = ~np.isin(merged_rows, stale)
+            merged_rows, merged_scores = merged_rows[fresh], merged_scores[fresh]
+            k -= stale.shape[0]
+        top = _top_rows(merged_scores, k)
+        return merged_rows[top], merged_scores[top]
+
+    def close(self):
+        """Stop the workers."""
+        if self._closed:
+            return
+        self._closed = True
+        for connection in self._connections:
+            try:
+                connection.send(None)
+                connection.close()
+            except (OSError, BrokenPipeError):
+                pass
+        for process in self._processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,171 @@
+"""
+Tag Index Module
+
+Items x tag-vocabulary sparse matrix of tag relevance weights, so scoring a
+tag query is one sparse matrix-vector product plus a top-k.
+"""
+
+import json
+import threading
+import numpy as np
+from scipy import sparse
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+TAG_CATEGORIES = ("emotions", "themes", "imagery", "style")
+
+
+def parse_structured_tags(tags_array: Optional[List[str]]) -> Dict[str, List[Dict[str, float]]]:
+    """Parse structured tags from the database array."""
+    structured_tags = {category: [] for category in TAG_CATEGORIES}
+
+    for tag_string in tags_array or []:
+        try:
+            if tag_string.startswith('{') and tag_string.endswith('}'):
+                # This is a structured tag
+                tag_data = json.loads(tag_string)
+                for category in structured_tags.keys():
+                    if category in tag_data and isinstance(tag_data[category], list):
+                        structured_tags[category].extend(tag_data[category])
+            else:
+                # This is a simple string tag - convert to structured format
+                # Add to themes category with medium relevance
+                structured_tags["themes"].append({"tag": tag_string, "relevance": 0.5})
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            # Invalid JSON or not a string - skip
+            continue
+
+    return structured_tags
+
+
+class TagIndex:
+    """Sparse item x tag relevance matrix with incremental row appends."""
+
+    # Pending rows are folded into the CSR matrix once this many accumulate
+    MERGE_THRESHOLD = 256
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.vocabulary: Dict[str, int] = {}
+        self.tags: List[str] = []
+        self._live: List[bool] = []
+        self._base = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._pending: List[Dict[int, float]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.id_to_row)
+
+    def _row_weights(self, structured_tags: Dict[str, List[Dict[str, float]]]) -> Dict[int, float]:
+        """Column -> summed relevance for one item, growing the vocabulary as needed."""
+        weights: Dict[int, float] = {}
+        for tag_list in structured_tags.values():
+            for tag_info in tag_list:
+                if not isinstance(tag_info, dict):
+                    continue
+                tag_name = str(tag_info.get('tag', '')).lower()
+                if not tag_name:
+                    continue
+                column = self.vocabulary.get(tag_name)
+                if column is None:
+                    column = len(self.tags)
+                    self.vocabulary[tag_name] = column
+                    self.tags.append(tag_name)
+                weights[column] = weights.get(column, 0.0) + float(tag_info.get('relevance', 0.5))
+        return weights
+
+    def add(self, item_id: str, tags_array: Optional[List[str]]):
+        """Add or replace an item's tags (raw semantic_tags array from the database)."""
+        structured_tags = parse_structured_tags(tags_array)
+        with self._lock:
+            weights = self._row_weights(structured_tags)
+            previous = self.id_to_row.get(item_id)
+            if previous is not None:
+                self._live[previous] = False
+            row = len(self.ids)
+            self.ids.append(item_id)
+            self.id_to_row[item_id] = row
+            self._live.append(True)
+            self._pending.append(weights)
+            if len(self._pending) >= self.MERGE_THRESHOLD:
+                self._merge()
+
+    def build(self, items: Iterable[Dict[str, Any]]):
+        """Index every item's 'semantic_tags' in one pass."""
+        for item in items:
+            self.add(item['id'], item.get('semantic_tags'))
+        with self._lock:
+            self._merge()
+
+    def _pending_matrix(self, columns: int) -> sparse.csr_matrix:
+        """CSR matrix of the rows not yet folded into the base matrix."""
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for weights in self._pending:
+            indices.extend(weights.keys())
+            data.extend(weights.values())
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(self._pending), columns)
+        )
+
+    def _merge(self):
+        """Fold pending rows into the base CSR matrix (caller holds the lock)."""
+        columns = len(self.tags)
+        base = self._base
+        base.resize((base.shape[0], columns))
+        self._base = sparse.vstack([base, self._pending_matrix(columns)], format='csr')
+        self._pending = []
+
+    def search(self, query_tags: List[str], top_k: int = 50, offset: int = 0) -> List[Tuple[str, float, List[str]]]:
+        """
+        Score items by the summed relevance of matching tags.
+
+        Args:
+            query_tags: Tags to look for (case-insensitive)
+            top_k: Number of results to return
+            offset: Number of leading results to skip
+
+        Returns:
+            List of (item_id, similarity, matched_tags), best first; similarity is
+            the summed relevance divided by the number of distinct query tags
+        """
+        query_set = {tag.lower() for tag in query_tags if tag}
+        columns = [self.vocabulary[tag] for tag in query_set if tag in self.vocabulary]
+        if not columns or not self.ids:
+            return []
+
+        with self._lock:
+            width = len(self.tags)
+            query = np.zeros(width, dtype=np.float32)
+            query[columns] = 1.0
+            base = self._base
+            base.resize((base.shape[0], width))
+            pending = self._pending_matrix(width)
+            live = np.asarray(self._live, dtype=bool)
+
+        # Score the two parts separately; stacking them would copy the whole base matrix
+        scores = base @ query
+        if pending.shape[0]:
+            scores = np.concatenate([scores, pending @ query])
+        scores /= len(query_set)
+        scores[~live] = 0.0
+
+        candidates = np.nonzero(scores > 0)[0]
+        k = min(offset + top_k, candidates.shape[0])
+        if k <= 0:
+            return []
+        if k < candidates.shape[0]:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')][offset:]
+
+        column_set = set(columns)
+        results = []
+        for row in candidates:
+            matrix, local = (base, row) if row < base.shape[0] else (pending, row - base.shape[0])
+            start, end = matrix.indptr[local], matrix.indptr[local + 1]
+            matched = [self.tags[c] for c in matrix.indices[start:end] if c in column_set]
+            results.append((self.ids[row], float(scores[row]), matched))
+        return results
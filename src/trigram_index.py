@@ -0,0 +1,144 @@
+"""
+Trigram Index Module
+
+In-process n-gram index over distinct author names and titles for typo-tolerant
+matching ("Yeets" -> "William Butler Yeats"). Similarity follows pg_trgm's
+word_similarity: words are padded and split into trigrams, and the query is
+compared by Jaccard overlap against the best-matching run of words in each
+entry, so a surname alone still matches a full name.
+"""
+
+import heapq
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Set, Tuple
+from .prefix_index import normalize_key
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """pg_trgm-style trigrams of a text (each word padded with two leading spaces and one trailing)."""
+    grams = set()
+    for word in normalize_key(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Overlap of two trigram sets relative to their union."""
+    if not a or not b:
+        return 0.0
+    overlap = len(a & b)
+    return overlap / (len(a) + len(b) - overlap)
+
+
+def word_similarity(query_grams: Set[str], query_words: int, words: List[Set[str]]) -> float:
+    """
+    Best trigram similarity between a query and any run of consecutive words.
+
+    Runs have as many words as the query (or all words when there are fewer),
+    so "yeets" is scored against "yeats" rather than all of "william butler yeats".
+
+    Args:
+        query_grams: Trigrams of the query
+        query_words: Number of words in the query
+        words: Trigram set of each word of the entry, in order
+    """
+    width = max(1, min(query_words, len(words)))
+    best = 0.0
+    for start in range(max(1, len(words) - width + 1)):
+        window = set().union(*words[start:start + width])
+        best = max(best, jaccard(query_grams, window))
+    return best
+
+
+class TrigramIndex:
+    """Fuzzy lookup of titles and author names by trigram similarity."""
+
+    # Candidates scored per query, and posting lists too common to be worth scanning
+    MAX_CANDIDATES = 200
+    MAX_POSTING_SCAN = 5000
+
+    def __init__(self):
+        # One entry per distinct (kind, normalized string)
+        self.entries: List[Dict[str, Any]] = []
+        self._entry_lookup: Dict[Tuple[str, str], int] = {}
+        self._gram_counts: List[int] = []
+        # Per-entry trigram set of each word, for word_similarity
+        self._word_grams: List[List[Set[str]]] = []
+        self.postings: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _add_string(self, kind: str, display: Optional[str], item_id: str):
+        normalized = normalize_key(display)
+        if not normalized:
+            return
+        entry_id = self._entry_lookup.get((kind, normalized))
+        if entry_id is not None:
+            self.entries[entry_id]['item_ids'].append(item_id)
+            return
+
+        grams = trigrams(normalized)
+        entry_id = len(self.entries)
+        self.entries.append({'type': kind, 'text': display.strip(), 'item_ids': [item_id]})
+        self._entry_lookup[(kind, normalized)] = entry_id
+        self._gram_counts.append(len(grams))
+        self._word_grams.append([trigrams(word) for word in normalized.split()])
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(entry_id)
+
+    def add(self, item: Dict[str, Any]):
+        """Index an item's title and author."""
+        with self._lock:
+            self._add_string('title', item.get('title'), item['id'])
+            self._add_string('author', item.get('author'), item['id'])
+
+    def build(self, items: List[Dict[str, Any]]):
+        """Index many items."""
+        for item in items:
+            self.add(item)
+
+    def search(self, query: str, limit: int = 10, threshold: float = 0.3,
+               kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Titles and authors most similar to a (possibly misspelled) query.
+
+        Only entries sharing a trigram with the query are considered, the most
+        common trigrams are skipped when rarer ones exist, and at most
+        MAX_CANDIDATES entries are scored, each by its best-matching run of
+        words (see word_similarity).
+
+        Returns:
+            Entries with 'type', 'text', 'item_ids' and 'similarity', best first
+        """
+        grams = trigrams(query)
+        if not grams:
+            return []
+        query_words = len(normalize_key(query).split())
+
+        lists = sorted((self.postings.get(gram, []) for gram in grams), key=len)
+        lists = [postings for postings in lists if postings]
+        selective = [postings for postings in lists if len(postings) <= self.MAX_POSTING_SCAN]
+        shared = Counter()
+        for postings in (selective or lists[:1]):
+            shared.update(postings)
+
+        candidates = heapq.nlargest(self.MAX_CANDIDATES, shared.items(), key=lambda entry: entry[1])
+        results = []
+        for entry_id, overlap in candidates:
+            entry = self.entries[entry_id]
+            if kind and entry['type'] != kind:
+                continue
+            # No run of words can beat overlap / len(grams), so most candidates skip the word scan
+            if overlap / len(grams) < threshold:
+                continue
+            similarity = max(overlap / (len(grams) + self._gram_counts[entry_id] - overlap),
+                             word_similarity(grams, query_words, self._word_grams[entry_id]))
+            if similarity >= threshold:
+                results.append(dict(entry, similarity=similarity))
+
+        results.sort(key=lambda entry: entry['similarity'], reverse=True)
+        return results[:limit]
@@ -0,0 +1,543 @@
+"""
+In-memory Vector Index Module
+
+Holds every item embedding in one contiguous, L2-normalized float32 matrix so
+semantic lookups are a single matrix-vector product plus an argpartition top-k.
+The matrix can also be memory-mapped from a .npy snapshot shared by every
+process on the machine.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import numpy as np
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Union, Set
+from utils.supabase_pagination import SupabasePagination
+from .projections import item_fields
+from .quantized_index import QuantizedIndex
+from .ivf_index import IVFIndex
+from .sharded_search import ShardedSearch
+from .neighbor_graph import NeighborGraph
+
+# Card fields kept alongside each vector, plus the embedding itself
+INDEX_SELECT_FIELDS = item_fields('card', 'vector')
+
+# Card fields that semantic search can be restricted on
+FILTER_FIELDS = ('type', 'curation_type', 'author', 'lang')
+
+Filters = Dict[str, Union[str, List[str]]]
+
+SNAPSHOT_VERSION = 2
+
+
+def fetch_item_embeddings(supabase, select_fields: str = INDEX_SELECT_FIELDS) -> List[Dict[str, Any]]:
+    """Fetch every item that has an embedding, paginating past Supabase's 1000-row cap."""
+    pagination = SupabasePagination(supabase, 'items')
+    return pagination.get_all_records_list(
+        select_fields=select_fields,
+        filters={'embedding_not_is': 'null'},
+        order_by='id',
+        order_desc=False
+    )
+
+
+def snapshot_table_path(path: str) -> str:
+    """Path of the id table stored next to a .npy embedding snapshot."""
+    return f"{os.path.splitext(path)[0]}.ids.json"
+
+
+@contextmanager
+def _snapshot_lock(path: str, exclusive: bool):
+    """
+    Advisory lock on a snapshot: writers take it exclusively, readers shared.
+
+    Readers of a read-only snapshot directory go without it; the commit token
+    still rejects a mismatched pair.
+    """
+    try:
+        lock_file = open(f"{path}.lock", 'a')
+    except OSError:
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def parse_embedding(embedding: Any) -> Optional[np.ndarray]:
+    """Decode a stored embedding (JSON string or list) into a float32 vector."""
+    if embedding is None:
+        return None
+    if isinstance(embedding, str):
+        embedding = json.loads(embedding)
+    vector = np.asarray(embedding, dtype=np.float32)
+    if vector.ndim != 1 or vector.size == 0:
+        return None
+    return vector
+
+
+def filter_value(value: Any) -> Optional[str]:
+    """Canonical form of a filter value (case- and whitespace-insensitive)."""
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    return value or None
+
+
+def normalize(vector: np.ndarray) -> np.ndarray:
+    """L2 normalize a vector (or each row of a matrix)."""
+    if vector.ndim == 1:
+        return vector / (np.linalg.norm(vector) + 1e-12)
+    return vector / (np.linalg.norm(vector, axis=1, keepdims=True) + 1e-12)
+
+
+class VectorIndex:
+    """
+    Cosine index over item embeddings kept in process memory.
+
+    Searches are exact brute force (optionally split across worker processes)
+    unless an IVF index and/or int8 quantizer is enabled to narrow the rows
+    that get exact scores.
+    """
+
+    def __init__(self, dim: int = 1536):
+        self.dim = dim
+        self.ids: List[str] = []
+        self.items: List[Dict[str, Any]] = []
+        self.id_to_row: Dict[str, int] = {}
+        # Ids whose embedding is missing or the wrong size, so they are not indexed
+        self.skipped_ids: Set[str] = set()
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        # field -> value -> rows holding that value, and a cached array form of each list
+        self._filter_rows: Dict[str, Dict[str, List[int]]] = {field: {} for field in FILTER_FIELDS}
+        self._filter_arrays: Dict[Tuple[str, str], np.ndarray] = {}
+        # Optional int8 codes used to pick candidates before exact re-ranking
+        self.quantizer: Optional[QuantizedIndex] = None
+        # Optional k-means inverted lists that limit which rows a query scores
+        self.ivf: Optional[IVFIndex] = None
+        # Optional worker processes that split brute-force scans across cores
+        self.shards: Optional[ShardedSearch] = None
+        # Optional precomputed item neighbours, kept row-aligned with the matrix
+        self.neighbor_graph: Optional[NeighborGraph] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.id_to_row
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The live rows of the embedding matrix (a view, not a copy)."""
+        return self._matrix[:self._size]
+
+    def build(self, rows: Iterable[Dict[str, Any]]):
+        """
+        Replace the index contents with the given item rows.
+
+        Args:
+            rows: Item dicts carrying an 'id' and an 'embedding'; every other
+                field is kept as the item's card data.
+        """
+        ids, items, vectors, skipped_ids = [], [], [], set()
+        for row in rows:
+            vector = parse_embedding(row.get('embedding'))
+            if vector is None or vector.shape[0] != self.dim:
+                skipped_ids.add(row['id'])
+                continue
+            ids.append(row['id'])
+            items.append({k: v for k, v in row.items() if k != 'embedding'})
+            vectors.append(vector)
+
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, self.dim), dtype=np.float32)
+        self._install(ids, items, np.ascontiguousarray(normalize(matrix), dtype=np.float32), len(ids), skipped_ids)
+
+    def _install(self, ids: List[str], items: List[Dict[str, Any]], matrix: np.ndarray, size: int,
+                 skipped_ids: Set[str]):
+        """Swap in new contents (matrix may hold spare rows past size) and rebuild derived structures."""
+        filter_rows = {field: {} for field in FILTER_FIELDS}
+        for row, item in enumerate(items):
+            for field in FILTER_FIELDS:
+                value = filter_value(item.get(field))
+                if value is not None:
+                    filter_rows[field].setdefault(value, []).append(row)
+
+        with self._lock:
+            self.ids = ids
+            self.items = items
+            self.id_to_row = {item_id: row for row, item_id in enumerate(ids)}
+            self.skipped_ids = skipped_ids
+            self._matrix = matrix
+            self._size = size
+            self._filter_rows = filter_rows
+            self._filter_arrays = {}
+            if self.shards is not None:
+                previous = self.shards
+                self._start_shards(len(previous))
+                previous.close()
+            if self.quantizer is not None:
+                self.quantizer.build(self.matrix)
+            if self.ivf is not None:
+                self.ivf.assign_all(self.matrix)
+            if self.neighbor_graph is not None:
+                self.neighbor_graph = self.neighbor_graph.align(ids, self.matrix)
+
+    def save_snapshot(self, path: str, headroom: int = 1024, built_at: Optional[str] = None):
+        """
+        Write the index as a .npy matrix plus a JSON id table alongside it.
+
+        Both files are written to unique temp files and swapped in under the
+        snapshot lock. The id table is replaced last and carries a token that is
+        also appended after the matrix data, so a reader can tell whether the
+        two files belong together.
+
+        Args:
+            path: Path of the .npy file; the id table goes to snapshot_table_path(path)
+            headroom: Spare zero rows after the live ones, so a process that maps
+                the snapshot can add items without copying the matrix
+            built_at: ISO timestamp the contents are current as of (defaults to now)
+        """
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        table_path = snapshot_table_path(path)
+        token = uuid.uuid4().hex
+
+        with _snapshot_lock(path, exclusive=True):
+            matrix_fd, matrix_temp = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+            table_fd, table_temp = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(table_path)}.", suffix='.tmp')
+            os.close(matrix_fd)
+            try:
+                with self._lock:
+                    size = self._size
+                    ids = list(self.ids)
+                    items = list(self.items)
+                    skipped_ids = sorted(self.skipped_ids)
+                    matrix = np.lib.format.open_memmap(
+                        matrix_temp, mode='w+', dtype=np.float32, shape=(size + headroom, self.dim)
+                    )
+                    matrix[:size] = self._matrix[:size]
+                    matrix.flush()
+                    del matrix
+                # np.load maps only the array, so trailing bytes are free for the token
+                with open(matrix_temp, 'ab') as f:
+                    f.write(token.encode('ascii'))
+
+                with os.fdopen(table_fd, 'w') as f:
+                    json.dump({
+                        'version': SNAPSHOT_VERSION,
+                        'token': token,
+                        'dim': self.dim,
+                        'size': size,
+                        'built_at': built_at or time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                        'ids': ids,
+                        'items': items,
+                        'skipped_ids': skipped_ids
+                    }, f)
+                os.replace(matrix_temp, path)
+                os.replace(table_temp, table_path)
+            except BaseException:
+                for temp_path in (matrix_temp, table_temp):
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                raise
+
+    def load_snapshot(self, path: str) -> str:
+        """
+        Map a snapshot written by save_snapshot() instead of holding a private copy.
+
+        The matrix is opened copy-on-write, so every process shares the page
+        cache; only rows a process adds or replaces become private memory.
+
+        Returns:
+            str: When the snapshot was written (ISO timestamp), for catching up on newer items
+
+        Raises:
+            ValueError: If the snapshot is from another version or its two files do not match
+        """
+        with _snapshot_lock(path, exclusive=False):
+            with open(snapshot_table_path(path)) as f:
+                table = json.load(f)
+            if table.get('version') != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported embedding snapshot version: {table.get('version')}")
+            token = table['token'].encode('ascii')
+            with open(path, 'rb') as f:
+                f.seek(-len(token), os.SEEK_END)
+                trailer = f.read()
+            matrix = np.load(path, mmap_mode='c')
+        size = table['size']
+        if (trailer != token or matrix.dtype != np.float32 or matrix.shape[1] != self.dim
+                or matrix.shape[0] < size):
+            raise ValueError(f"Embedding snapshot {path} does not match its id table")
+        self._install(table['ids'], table['items'], matrix, size, set(table['skipped_ids']))
+        return table['built_at']
+
+    def enable_quantization(self, rerank: int = 300, recall_k: int = 10) -> QuantizedIndex:
+        """
+        Serve searches from int8 codes plus an exact re-rank of the best candidates.
+
+        Args:
+            rerank: Candidates re-scored against the exact vectors per query
+            recall_k: k at which recall against brute force is measured and recorded
+
+        Returns:
+            QuantizedIndex: The quantizer, with its measured recall in .recall
+        """
+        quantizer = QuantizedIndex(self.dim, rerank)
+        quantizer.build(self.matrix)
+        quantizer.measure_recall(self.matrix, recall_k)
+        with self._lock:
+            self.quantizer = quantizer
+        return quantizer
+
+    def enable_ivf(self, ivf: IVFIndex) -> IVFIndex:
+        """Serve searches from the nearest inverted lists of a trained IVF index."""
+        ivf.assign_all(self.matrix)
+        with self._lock:
+            self.ivf = ivf
+        return ivf
+
+    def enable_sharding(self, workers: int) -> ShardedSearch:
+        """Split brute-force scans across worker processes, each owning a contiguous block of rows."""
+        with self._lock:
+            previous = self.shards
+            shards = self._start_shards(workers)
+        if previous is not None:
+            previous.close()
+        return shards
+
+    def _start_shards(self, workers: int) -> ShardedSearch:
+        """
+        Start shard workers over the current rows (caller holds the lock).
+
+        Workers are forked and read the matrix they inherit, so the vectors are
+        not copied. Rows added or replaced afterwards are scored locally.
+        """
+        self.shards = ShardedSearch(self.matrix, workers)
+        return self.shards
+
+    def enable_neighbor_graph(self, graph: NeighborGraph) -> NeighborGraph:
+        """Align a neighbour graph with the index rows and keep it in step with add()."""
+        with self._lock:
+            self.neighbor_graph = graph.align(self.ids, self.matrix)
+            return self.neighbor_graph
+
+    def add(self, item_id: str, embedding: Any, item: Optional[Dict[str, Any]] = None) -> bool:
+        """Add (or replace) a single item's embedding."""
+        vector = parse_embedding(embedding)
+        if vector is None or vector.shape[0] != self.dim:
+            with self._lock:
+                if item_id not in self.id_to_row:
+                    self.skipped_ids.add(item_id)
+            return False
+        vector = normalize(vector)
+        card = {k: v for k, v in (item or {'id': item_id}).items() if k != 'embedding'}
+
+        with self._lock:
+            self.skipped_ids.discard(item_id)
+            row = self.id_to_row.get(item_id)
+            if row is not None:
+                self._unlink_filters(row, self.items[row])
+                self._matrix[row] = vector
+                self.items[row] = card
+                self._link_filters(row, card)
+                if self.quantizer is not None:
+                    self.quantizer.set(row, vector)
+                if self.ivf is not None:
+                    self.ivf.set(row, vector)
+                if self.shards is not None:
+                    self.shards.set(row)
+                return True
+
+            if self._size == self._matrix.shape[0]:
+                # Grow geometrically so repeated inserts stay amortized O(d)
+                capacity = max(16, self._matrix.shape[0] * 2)
+                grown = np.zeros((capacity, self.dim), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+
+            self._matrix[self._size] = vector
+            self.ids.append(item_id)
+            self.items.append(card)
+            self.id_to_row[item_id] = self._size
+            self._link_filters(self._size, card)
+            if self.quantizer is not None:
+                self.quantizer.set(self._size, vector)
+            if self.ivf is not None:
+                self.ivf.set(self._size, vector)
+            self._size += 1
+            if self.neighbor_graph is not None:
+                # Same lock as the row assignment, so graph and matrix rows cannot diverge
+                self.neighbor_graph.add(item_id, self._size - 1, self.matrix)
+            return True
+
+    def _link_filters(self, row: int, item: Dict[str, Any]):
+        """Record a row under its filter values (caller holds the lock)."""
+        for field in FILTER_FIELDS:
+            value = filter_value(item.get(field))
+            if value is not None:
+                self._filter_rows[field].setdefault(value, []).append(row)
+                self._filter_arrays.pop((field, value), None)
+
+    def _unlink_filters(self, row: int, item: Dict[str, Any]):
+        """Drop a row from its filter values (caller holds the lock)."""
+        for field in FILTER_FIELDS:
+            value = filter_value(item.get(field))
+            rows = self._filter_rows[field].get(value)
+            if rows and row in rows:
+                rows.remove(row)
+                self._filter_arrays.pop((field, value), None)
+
+    def _value_rows(self, field: str, value: str) -> np.ndarray:
+        """Sorted rows holding a filter value, cached as an array."""
+        key = (field, value)
+        rows = self._filter_arrays.get(key)
+        if rows is None:
+            rows = np.array(sorted(self._filter_rows[field].get(value, [])), dtype=np.int64)
+            self._filter_arrays[key] = rows
+        return rows
+
+    def filter_rows(self, filters: Optional[Filters]) -> Optional[np.ndarray]:
+        """
+        Rows matching every filter (values within one field are alternatives).
+
+        Returns:
+            Sorted row array, or None when no filters apply (every row matches)
+        """
+        selected = None
+        for field, values in (filters or {}).items():
+            if field not in FILTER_FIELDS or values in (None, '', []):
+                continue
+            if isinstance(values, str):
+                values = [values]
+            rows = [self._value_rows(field, v) for v in {filter_value(v) for v in values} if v is not None]
+            field_rows = np.unique(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64)
+            selected = field_rows if selected is None else np.intersect1d(selected, field_rows, assume_unique=True)
+        return selected
+
+    def matches_filters(self, item: Dict[str, Any], filters: Optional[Filters]) -> bool:
+        """Whether an item's card satisfies the filters."""
+        for field, values in (filters or {}).items():
+            if field not in FILTER_FIELDS or values in (None, '', []):
+                continue
+            if isinstance(values, str):
+                values = [values]
+            if filter_value(item.get(field)) not in {filter_value(v) for v in values}:
+                return False
+        return True
+
+    def get_vector(self, item_id: str) -> Optional[np.ndarray]:
+        """Return the normalized vector stored for an item."""
+        row = self.id_to_row.get(item_id)
+        if row is None:
+            return None
+        return self._matrix[row]
+
+    def get_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Return the card data stored for an item."""
+        row = self.id_to_row.get(item_id)
+        if row is None:
+            return None
+        return self.items[row]
+
+    def similarities(self, query: Any, item_ids: Iterable[str]) -> Dict[str, float]:
+        """Cosine similarity between a query vector and specific indexed items."""
+        vector = parse_embedding(query)
+        if vector is None or vector.shape[0] != self.dim:
+            return {}
+        vector = normalize(vector)
+        ids = [i for i in item_ids if i in self.id_to_row]
+        if not ids:
+            return {}
+        rows = [self.id_to_row[i] for i in ids]
+        scores = self._matrix[rows] @ vector
+        return {item_id: float(score) for item_id, score in zip(ids, scores)}
+
+    def search(self, query: Any, top_k: int = 5, offset: int = 0,
+               exclude_ids: Optional[Iterable[str]] = None,
+               filters: Optional[Filters] = None) -> List[Tuple[str, float]]:
+        """
+        Find the items closest to a query vector by cosine similarity.
+
+        Args:
+            query: Query embedding (need not be normalized)
+            top_k: Number of results to return
+            offset: Number of leading results to skip
+            exclude_ids: Item IDs that must not appear in the results
+            filters: Field -> value(s) restrictions on FILTER_FIELDS; only the
+                matching rows are scored
+
+        Returns:
+            List[Tuple[str, float]]: (item_id, similarity) pairs, best first
+        """
+        vector = parse_embedding(query)
+        if vector is None or vector.shape[0] != self.dim or self._size == 0 or top_k <= 0:
+            return []
+        vector = normalize(vector)
+
+        subset = self.filter_rows(filters)
+        excluded = [self.id_to_row[i] for i in exclude_ids or [] if i in self.id_to_row]
+
+        rows = subset
+        count = self._size if subset is None else subset.shape[0]
+        needed = offset + top_k + len(excluded)
+        ivf = self.ivf
+        if ivf is not None and len(ivf) == self._size:
+            # Only the nearest inverted lists; the whole subset if they cannot fill the page
+            probed = ivf.candidates(vector, subset)
+            if probed.shape[0] >= needed:
+                rows, count = probed, probed.shape[0]
+
+        quantizer = self.quantizer
+        if quantizer is not None and len(quantizer) == self._size:
+            # Approximate scan over the int8 codes, then exact scores for the shortlist only
+            shortlist = max(quantizer.rerank, needed)
+            if shortlist < count:
+                rows = np.sort(quantizer.candidates(vector, shortlist, rows))
+
+        shards = self.shards
+        if shards is not None and rows is subset:
+            # Scatter-gather over the worker shards, plus rows added or replaced since they were started
+            shard_rows, shard_scores = shards.search(vector, min(needed, count), subset)
+            tail = np.arange(shards.size, self._size) if subset is None else subset[subset >= shards.size]
+            stale = shards.stale
+            if stale.shape[0]:
+                stale = stale if subset is None else stale[np.isin(stale, subset)]
+                tail = np.concatenate([stale, tail])
+            rows = np.concatenate([shard_rows, tail])
+            scores = np.concatenate([shard_scores, self._matrix[tail] @ vector])
+            order = np.argsort(rows)
+            rows, scores = rows[order], scores[order]
+        elif rows is None:
+            scores = self.matrix @ vector
+        else:
+            scores = self._matrix[rows] @ vector
+
+        if excluded:
+            if rows is not None:
+                positions = np.searchsorted(rows, excluded)
+                excluded = [p for p, r in zip(positions, excluded) if p < rows.shape[0] and rows[p] == r]
+            if excluded:
+                scores[excluded] = -np.inf
+
+        k = min(offset + top_k, scores.shape[0])
+        if k <= 0:
+            return []
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top], kind='stable')][offset:]
+        top = [position for position in top if np.isfinite(scores[position])]
+
+        result_rows = top if rows is None else rows[top]
+        return [(self.ids[row], float(scores[position])) for row, position in zip(result_rows, top)]
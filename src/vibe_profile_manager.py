@@ -5,26 +5,70 @@ Simple Vibe Profile Manager for assigning items to vibe profiles.
 import os
 import json
 import math
+import time
+import hashlib
 import numpy as np
 from typing import List, Dict, Any, Optional
 from supabase import create_client
 from dotenv import load_dotenv
+from .vector_index import VectorIndex, fetch_item_embeddings, parse_embedding, normalize
+from .projections import item_fields, vibe_profile_fields
+from .result_cache import ResultCache
+from utils.supabase_pagination import SupabasePagination
+from .single_flight import SingleFlight
 
 load_dotenv()
 
+# Postgres error code for a unique constraint violation
+UNIQUE_VIOLATION = '23505'
+
+
+def seed_items_hash(item_ids: List[str]) -> Optional[str]:
+    """Content hash of a set of item ids (sha256 of the sorted distinct ids), None when empty."""
+    ids = sorted(set(item_ids or []))
+    if not ids:
+        return None
+    return hashlib.sha256('\n'.join(ids).encode('utf-8')).hexdigest()
+
+
+def is_unique_violation(error: Exception) -> bool:
+    """Whether a Supabase error is a unique constraint conflict."""
+    return getattr(error, 'code', None) == UNIQUE_VIOLATION or UNIQUE_VIOLATION in str(error)
+
+
 class VibeProfileManager:
     """Simple manager for vibe profile item assignments."""
     
-    def __init__(self):
+    # Seconds before the profile centroid index is reloaded to pick up other workers' writes
+    PROFILE_INDEX_REFRESH_SECONDS = 300
+    
+    # Seed ids per bulk item query, keeping the in_() filter well inside URL length limits
+    ITEM_FETCH_CHUNK_SIZE = 500
+    
+    def __init__(self, vector_index: Optional[VectorIndex] = None, result_cache: Optional[ResultCache] = None):
         self.supabase_url = os.getenv('SUPABASE_URL')
         self.supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
         self.supabase = create_client(self.supabase_url, self.supabase_key)
+        self.embedding_dim = int(os.getenv('EMBEDDING_DIM', '1536'))
+        
+        # Shared in-memory item index (owned by the recommendation engine)
+        self.vector_index = vector_index
+        
+        # Ranked similar-item lists per profile (shared with the engine, which clears it on add_item)
+        self.result_cache = result_cache if result_cache is not None else ResultCache()
+        
+        # Concurrent identical profile searches share one execution
+        self.single_flight = SingleFlight()
+        
+        # In-memory matrix of profile centroids, loaded on first use
+        self.profile_index: Optional[VectorIndex] = None
+        self._profile_index_loaded_at = 0.0
     
     def assign_item_to_vibe_profile(self, item_id: str, vibe_profile_id: str, similarity_score: float = None) -> bool:
         """Assign an item to a vibe profile."""
         try:
             # Get current vibe profile
-            profile_result = self.supabase.table('vibe_profiles').select('seed_item_ids').eq('id', vibe_profile_id).execute()
+            profile_result = self.supabase.table('vibe_profiles').select('seed_item_ids, vector_sum').eq('id', vibe_profile_id).execute()
             
             if not profile_result.data:
                 print(f"Vibe profile {vibe_profile_id} not found")
@@ -40,17 +84,15 @@ class VibeProfileManager:
             # Add item to the list
             new_item_ids = current_item_ids + [item_id]
             
-            # Update the vibe profile
-            result = self.supabase.table('vibe_profiles').update({
-                'seed_item_ids': new_item_ids,
-                'size': len(new_item_ids)
-            }).eq('id', vibe_profile_id).execute()
+            # Add the item's normalized vector to the running sum (rebuilt from every member if missing)
+            vector_sum = parse_embedding(profile_result.data[0].get('vector_sum'))
+            if vector_sum is None:
+                vector_sum = self._vector_sum(new_item_ids)
+            else:
+                vector_sum = vector_sum + self._vector_sum([item_id])
             
-            if result.data:
-                # Update the vector
-                self.update_vibe_profile_vector(vibe_profile_id)
-                return True
-            return False
+            # Update the vibe profile and its centroid in one write
+            return self._write_centroid(vibe_profile_id, vector_sum, new_item_ids)
             
         except Exception as e:
             print(f"Error assigning item to vibe profile: {e}")
@@ -60,7 +102,7 @@ class VibeProfileManager:
         """Remove an item from a vibe profile."""
         try:
             # Get current vibe profile
-            profile_result = self.supabase.table('vibe_profiles').select('seed_item_ids').eq('id', vibe_profile_id).execute()
+            profile_result = self.supabase.table('vibe_profiles').select('seed_item_ids, vector_sum').eq('id', vibe_profile_id).execute()
             
             if not profile_result.data:
                 print(f"Vibe profile {vibe_profile_id} not found")
@@ -72,16 +114,17 @@ class VibeProfileManager:
             if item_id in current_item_ids:
                 new_item_ids = [id for id in current_item_ids if id != item_id]
                 
-                # Update the vibe profile
-                result = self.supabase.table('vibe_profiles').update({
-                    'seed_item_ids': new_item_ids,
-                    'size': len(new_item_ids)
-                }).eq('id', vibe_profile_id).execute()
+                # Subtract the item's normalized vector from the running sum; rebuild it from the
+                # remaining items if the sum is missing or the item's vector is gone
+                vector_sum = parse_embedding(profile_result.data[0].get('vector_sum'))
+                removed = self._vector_sum([item_id]) if vector_sum is not None else None
+                if removed is None or not removed.any():
+                    vector_sum = self._vector_sum(new_item_ids)
+                else:
+                    vector_sum = vector_sum - removed
                 
-                if result.data:
-                    # Update the vector
-                    self.update_vibe_profile_vector(vibe_profile_id)
-                    return True
+                # Update the vibe profile and its centroid in one write
+                return self._write_centroid(vibe_profile_id, vector_sum, new_item_ids)
             
             return False
             
@@ -89,8 +132,8 @@ class VibeProfileManager:
             print(f"Error removing item from vibe profile: {e}")
             return False
     
-    def get_items_for_vibe_profile(self, vibe_profile_id: str) -> List[Dict[str, Any]]:
-        """Get all items for a vibe profile."""
+    def get_items_for_vibe_profile(self, vibe_profile_id: str, projection: str = 'card') -> List[Dict[str, Any]]:
+        """Get all items for a vibe profile, fetching the columns of the named item projection."""
         try:
             # Get the vibe profile with its seed_item_ids
             profile_result = self.supabase.table('vibe_profiles').select('seed_item_ids').eq('id', vibe_profile_id).execute()
@@ -104,7 +147,7 @@ class VibeProfileManager:
                 return []
             
             # Get the items
-            items_result = self.supabase.table('items').select('*').in_('id', item_ids).execute()
+            items_result = self.supabase.table('items').select(item_fields(projection)).in_('id', item_ids).execute()
             
             # Format to match the old junction table structure
             formatted_items = []
@@ -123,15 +166,9 @@ class VibeProfileManager:
     def get_vibe_profiles_for_item(self, item_id: str) -> List[Dict[str, Any]]:
         """Get all vibe profiles for an item."""
         try:
-            # Get all vibe profiles and filter those that contain this item_id
-            profiles_result = self.supabase.table('vibe_profiles').select('*').execute()
-            
-            # Filter profiles that contain this item_id in their seed_item_ids
-            matching_profiles = []
-            for profile in (profiles_result.data or []):
-                seed_item_ids = profile.get('seed_item_ids', [])
-                if item_id in seed_item_ids:
-                    matching_profiles.append(profile)
+            # Only the profiles whose seed_item_ids contain this item (GIN-indexed jsonb containment)
+            profiles_result = self.supabase.table('vibe_profiles').select(vibe_profile_fields('summary')).contains('seed_item_ids', json.dumps([item_id])).execute()
+            matching_profiles = profiles_result.data or []
             
             # Format to match the old junction table structure
             formatted_profiles = []
@@ -201,24 +238,30 @@ class VibeProfileManager:
                     print(f"Vibe profile with the same content already exists: {existing_content['name']}")
                     return existing_content['id']  # Return existing ID
             
-            # Create a default empty vector (1536 dimensions of zeros)
-            default_vector = [0.0] * 1536
+            # Members, running sum and centroid are computed up front so the profile is written once
+            item_ids = list(dict.fromkeys(item_ids or []))
+            vector_sum = self._vector_sum(item_ids) if item_ids else np.zeros(self.embedding_dim)
+            centroid = normalize(vector_sum).tolist()
             
-            result = self.supabase.table('vibe_profiles').insert({
-                'name': name,
-                'vector': default_vector,
-                'size': 0,
-                'seed_item_ids': []
-            }).execute()
+            try:
+                result = self.supabase.table('vibe_profiles').insert({
+                    'name': name,
+                    'vector': centroid,
+                    'vector_sum': vector_sum.tolist(),
+                    'size': len(item_ids),
+                    'seed_item_ids': item_ids,
+                    'seed_items_hash': seed_items_hash(item_ids)
+                }).execute()
+            except Exception as e:
+                if not is_unique_violation(e):
+                    raise
+                # Created concurrently by another request; return that profile
+                existing_content = self._find_vibe_profile_with_items(item_ids)
+                return existing_content['id'] if existing_content else None
             
             if result.data:
                 vibe_profile_id = result.data[0]['id']
-                
-                # Add items to the vibe profile if provided
-                if item_ids:
-                    for item_id in item_ids:
-                        self.assign_item_to_vibe_profile(item_id, vibe_profile_id)
-                
+                self._refresh_profile_centroid(vibe_profile_id, centroid, name=name, size=len(item_ids))
                 return vibe_profile_id
             return None
         except Exception as e:
@@ -226,96 +269,107 @@ class VibeProfileManager:
             return None
     
     def _find_vibe_profile_with_items(self, item_ids: List[str]) -> Optional[Dict[str, Any]]:
-        """Find a vibe profile that contains exactly the same set of poems."""
+        """Find a vibe profile that contains exactly the same set of poems (one indexed lookup)."""
         try:
-            # Get all vibe profiles
-            profiles_result = self.supabase.table('vibe_profiles').select('*').execute()
-            
-            if not profiles_result.data:
+            content_hash = seed_items_hash(item_ids)
+            if content_hash is None:
                 return None
             
-            # Sort the input item_ids for comparison
-            sorted_input_ids = sorted(item_ids)
+            profiles_result = self.supabase.table('vibe_profiles').select(vibe_profile_fields('summary')).eq('seed_items_hash', content_hash).limit(1).execute()
             
-            for profile in profiles_result.data:
-                # Get items for this vibe profile
-                items = self.get_items_for_vibe_profile(profile['id'])
-                profile_item_ids = []
-                
-                for item in items:
-                    item_data = item.get('items')
-                    if item_data and item_data.get('id'):
-                        profile_item_ids.append(item_data['id'])
-                
-                # Sort and compare
-                sorted_profile_ids = sorted(profile_item_ids)
-                
-                if sorted_input_ids == sorted_profile_ids:
-                    return {
-                        'id': profile['id'],
-                        'name': profile['name'],
-                        'size': len(profile_item_ids)
-                    }
+            if not profiles_result.data:
+                return None
             
-            return None
+            profile = profiles_result.data[0]
+            return {
+                'id': profile['id'],
+                'name': profile['name'],
+                'size': profile.get('size')
+            }
             
         except Exception as e:
             print(f"Error finding vibe profile with poems: {e}")
             return None
     
+    def _vector_sum(self, item_ids: List[str]) -> np.ndarray:
+        """Sum of the L2-normalized embeddings of items (zeros when none have one)."""
+        total = np.zeros(self.embedding_dim, dtype=np.float64)
+        missing = []
+        for item_id in item_ids:
+            vector = self.vector_index.get_vector(item_id) if self.vector_index is not None else None
+            if vector is not None:
+                total += vector  # index rows are already normalized
+            else:
+                missing.append(item_id)
+        
+        for start in range(0, len(missing), self.ITEM_FETCH_CHUNK_SIZE):
+            chunk = missing[start:start + self.ITEM_FETCH_CHUNK_SIZE]
+            items_result = self.supabase.table('items').select(item_fields('vector')).in_('id', chunk).execute()
+            for item in (items_result.data or []):
+                vector = parse_embedding(item.get('embedding'))
+                if vector is not None and vector.shape[0] == self.embedding_dim:
+                    total += normalize(vector)
+        return total
+    
+    def _write_centroid(self, vibe_profile_id: str, vector_sum: np.ndarray,
+                        item_ids: Optional[List[str]] = None) -> bool:
+        """Store a profile's running sum and the centroid derived from it (plus its members and their hash, if given)."""
+        if item_ids is not None and not item_ids:
+            # Reset rather than carry floating-point residue into the next member
+            vector_sum = np.zeros(self.embedding_dim, dtype=np.float64)
+        centroid = normalize(np.asarray(vector_sum, dtype=np.float64)).tolist()
+        
+        update = {'vector': centroid, 'vector_sum': np.asarray(vector_sum).tolist()}
+        if item_ids is not None:
+            update['seed_item_ids'] = item_ids
+            update['size'] = len(item_ids)
+            update['seed_items_hash'] = seed_items_hash(item_ids)
+        try:
+            result = self.supabase.table('vibe_profiles').update(update).eq('id', vibe_profile_id).execute()
+        except Exception as e:
+            if not is_unique_violation(e):
+                raise
+            print(f"Vibe profile {vibe_profile_id} not updated: another profile already has exactly these items")
+            return False
+        if not result.data:
+            return False
+        
+        self.result_cache.invalidate(('vibe_profile', vibe_profile_id))
+        if item_ids is not None:
+            self._refresh_profile_centroid(vibe_profile_id, centroid, size=len(item_ids))
+        else:
+            self._refresh_profile_centroid(vibe_profile_id, centroid)
+        return True
+    
     def compute_vibe_profile_vector(self, vibe_profile_id: str) -> Optional[List[float]]:
         """Compute the centroid vector for a vibe profile based on its poems."""
         try:
-            # Get all poems in this vibe profile
-            items = self.get_items_for_vibe_profile(vibe_profile_id)
-            
-            if not items:
+            profile_result = self.supabase.table('vibe_profiles').select('seed_item_ids').eq('id', vibe_profile_id).execute()
+            if not profile_result.data:
                 return None
             
-            # Extract embeddings
-            embeddings = []
-            for item in items:
-                poem = item.get('items')
-                if poem and poem.get('embedding'):
-                    if isinstance(poem['embedding'], str):
-                        embedding = json.loads(poem['embedding'])
-                    else:
-                        embedding = poem['embedding']
-                    embeddings.append(embedding)
-            
-            if not embeddings:
+            # Centroid of the L2-normalized embeddings, itself L2-normalized
+            vector_sum = self._vector_sum(profile_result.data[0].get('seed_item_ids') or [])
+            if not vector_sum.any():
                 return None
-            
-            # Convert to numpy array
-            embeddings_array = np.array(embeddings)
-            
-            # L2 normalize each embedding
-            normalized_embeddings = embeddings_array / (np.linalg.norm(embeddings_array, axis=1, keepdims=True) + 1e-12)
-            
-            # Calculate centroid
-            centroid = normalized_embeddings.mean(axis=0)
-            centroid = centroid / (np.linalg.norm(centroid) + 1e-12)  # L2 normalize centroid
-            
-            return centroid.tolist()
+            return normalize(vector_sum).tolist()
             
         except Exception as e:
             print(f"Error computing vibe profile vector: {e}")
             return None
     
     def update_vibe_profile_vector(self, vibe_profile_id: str) -> bool:
-        """Update the centroid vector for a vibe profile."""
+        """Recompute a vibe profile's running sum and centroid from every member."""
         try:
-            vector = self.compute_vibe_profile_vector(vibe_profile_id)
-            
-            if vector is None:
+            profile_result = self.supabase.table('vibe_profiles').select('seed_item_ids').eq('id', vibe_profile_id).execute()
+            if not profile_result.data:
                 return False
             
-            # Update the vibe profile with the new vector
-            result = self.supabase.table('vibe_profiles').update({
-                'vector': vector
-            }).eq('id', vibe_profile_id).execute()
+            vector_sum = self._vector_sum(profile_result.data[0].get('seed_item_ids') or [])
+            if not vector_sum.any():
+                return False
             
-            return bool(result.data)
+            return self._write_centroid(vibe_profile_id, vector_sum)
             
         except Exception as e:
             print(f"Error updating vibe profile vector: {e}")
@@ -328,28 +382,52 @@ class VibeProfileManager:
                 'name': name
             }).eq('id', vibe_profile_id).execute()
             
+            self._refresh_profile_centroid(vibe_profile_id, name=name)
             return bool(result.data)
         except Exception as e:
             print(f"Error updating vibe profile name: {e}")
             return False
     
-    def get_all_vibe_profiles_with_poems(self) -> List[Dict[str, Any]]:
-        """Get all vibe profiles with their associated poems."""
+    def _get_item_cards(self, item_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Card data for many items: from the shared vector index where loaded, one chunked query for the rest."""
+        cards = {}
+        missing = []
+        for item_id in dict.fromkeys(item_ids):
+            card = self.vector_index.get_item(item_id) if self.vector_index is not None else None
+            if card is not None:
+                cards[item_id] = card
+            else:
+                missing.append(item_id)
+        
+        for start in range(0, len(missing), self.ITEM_FETCH_CHUNK_SIZE):
+            chunk = missing[start:start + self.ITEM_FETCH_CHUNK_SIZE]
+            items_result = self.supabase.table('items').select(item_fields('card')).in_('id', chunk).execute()
+            for item in (items_result.data or []):
+                cards[item['id']] = item
+        return cards
+    
+    def get_all_vibe_profiles_with_poems(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get vibe profiles (newest first, optionally one page) with their poems, in two round trips."""
         try:
-            # Get all vibe profiles
-            profiles_result = self.supabase.table('vibe_profiles').select('*').order('created_at', desc=True).execute()
+            # Get the vibe profiles
+            query = self.supabase.table('vibe_profiles').select(vibe_profile_fields('summary')).order('created_at', desc=True)
+            if limit is not None:
+                query = query.range(offset, offset + limit - 1)
+            profiles_result = query.execute()
             
             if not profiles_result.data:
                 return []
             
+            # One bulk fetch over the union of every profile's items, joined in memory
+            cards = self._get_item_cards([
+                item_id for profile in profiles_result.data for item_id in (profile.get('seed_item_ids') or [])
+            ])
+            
             vibes = []
             for profile in profiles_result.data:
-                # Get poems for this vibe profile
-                poems = self.get_items_for_vibe_profile(profile['id'])
                 poem_data = []
-                
-                for item in poems:
-                    poem = item.get('items')
+                for item_id in profile.get('seed_item_ids') or []:
+                    poem = cards.get(item_id)
                     if poem:
                         poem_data.append({
                             'id': poem['id'],
@@ -377,7 +455,7 @@ class VibeProfileManager:
         """Get a single vibe profile with its associated poems."""
         try:
             # Get the vibe profile
-            profile_result = self.supabase.table('vibe_profiles').select('*').eq('id', vibe_profile_id).execute()
+            profile_result = self.supabase.table('vibe_profiles').select(vibe_profile_fields('summary')).eq('id', vibe_profile_id).execute()
             
             if not profile_result.data:
                 return None
@@ -412,9 +490,24 @@ class VibeProfileManager:
     
     def find_similar_to_vibe_profile(self, vibe_profile_id: str, top_k: int = 5, exclude_item_ids: List[str] = None) -> List[Dict[str, Any]]:
         """Find poems similar to a vibe profile's vector, excluding poems already in the profile and additional exclusions."""
+        key = ('vibe_profile', vibe_profile_id, tuple(sorted(set(exclude_item_ids or []))))
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            ranked_top_k, ranked = cached
+            if ranked_top_k >= top_k or len(ranked) < ranked_top_k:
+                return [dict(result) for result in ranked[:top_k]]
+        
+        ranked = self.single_flight.do(key + (top_k,), self._rank_similar_to_vibe_profile,
+                                       vibe_profile_id, top_k, exclude_item_ids)
+        if ranked:
+            self.result_cache.put(key, (top_k, ranked))
+        return [dict(result) for result in ranked]
+    
+    def _rank_similar_to_vibe_profile(self, vibe_profile_id: str, top_k: int, exclude_item_ids: List[str] = None) -> List[Dict[str, Any]]:
+        """Rank items against a vibe profile's centroid (see find_similar_to_vibe_profile)."""
         try:
-            # Get the vibe profile vector
-            profile_result = self.supabase.table('vibe_profiles').select('vector').eq('id', vibe_profile_id).execute()
+            # Get the vibe profile vector and the poems already in it
+            profile_result = self.supabase.table('vibe_profiles').select(vibe_profile_fields('vector')).eq('id', vibe_profile_id).execute()
             vector = profile_result.data[0].get('vector') if profile_result.data else None
             
             if not vector:
@@ -425,14 +518,17 @@ class VibeProfileManager:
                 vector = json.loads(vector)
             vector = np.array(vector, dtype=np.float32)
             
-            # Get poems already in this vibe profile to exclude them
-            profile_result = self.supabase.table('vibe_profiles').select('seed_item_ids').eq('id', vibe_profile_id).execute()
-            existing_item_ids = set(profile_result.data[0].get('seed_item_ids', []) if profile_result.data else [])
+            # Exclude poems already in this vibe profile
+            existing_item_ids = set(profile_result.data[0].get('seed_item_ids') or [])
             
             # Add additional items to exclude (e.g., already displayed items)
             if exclude_item_ids:
                 existing_item_ids.update(exclude_item_ids)
             
+            # Serve from the in-memory vector index when it is loaded
+            if self.vector_index is not None and len(self.vector_index) > 0:
+                return self._index_similarity_search(vector, existing_item_ids, top_k)
+            
             # Use Supabase vector similarity search for accurate and fast results
             try:
                 # Convert vector to the format Supabase expects
@@ -480,8 +576,9 @@ class VibeProfileManager:
                         except (ValueError, TypeError):
                             similarity = 0.0
                     
+                    # match_items returns whole rows; keep vectors out of API responses
                     similarities.append({
-                        'item': poem,
+                        'item': {k: v for k, v in poem.items() if k not in ('embedding', 'text_tsv', 'similarity')},
                         'similarity': similarity
                     })
                 
@@ -498,60 +595,83 @@ class VibeProfileManager:
             print(f"Error finding similar to vibe profile: {e}")
             return []
     
+    def _index_similarity_search(self, vector, existing_item_ids, top_k):
+        """Rank items against a vector with the in-memory vector index."""
+        matches = self.vector_index.search(vector, top_k, exclude_ids=existing_item_ids)
+        return [{
+            'item': self.vector_index.get_item(item_id),
+            'similarity': similarity
+        } for item_id, similarity in matches]
+    
     def _manual_similarity_search(self, vector, existing_item_ids, top_k):
         """Fallback method for similarity search when vector search is not available."""
         try:
-            # Get all poems with embeddings
-            poems_result = self.supabase.table('items').select('*').not_.is_('embedding', 'null').execute()
-            
-            if not poems_result.data:
-                return []
+            # Load every poem with an embedding into the index (paginated past the 1000-row cap)
+            if self.vector_index is None:
+                self.vector_index = VectorIndex(dim=len(vector))
+            if len(self.vector_index) == 0:
+                self.vector_index.build(fetch_item_embeddings(self.supabase))
             
-            # Filter out items that are already in the vibe profile or in the exclusion list
-            available_poems = [poem for poem in poems_result.data if poem['id'] not in existing_item_ids]
-            
-            if not available_poems:
-                return []
-            
-            # Calculate similarities
-            similarities = []
-            for poem in available_poems:
-                if poem.get('embedding'):
-                    if isinstance(poem['embedding'], str):
-                        poem_embedding = json.loads(poem['embedding'])
-                    else:
-                        poem_embedding = poem['embedding']
-                    
-                    # Ensure poem embedding is a numpy array of floats
-                    poem_embedding = np.array(poem_embedding, dtype=np.float32)
-                    
-                    # Calculate cosine similarity
-                    vector_norm = np.linalg.norm(vector)
-                    poem_norm = np.linalg.norm(poem_embedding)
-                    
-                    # Avoid division by zero and NaN values
-                    if vector_norm == 0 or poem_norm == 0:
-                        similarity = 0.0
-                    else:
-                        similarity = np.dot(vector, poem_embedding) / (vector_norm * poem_norm)
-                        # Ensure similarity is a valid number
-                        similarity = float(similarity)
-                        if math.isnan(similarity) or math.isinf(similarity):
-                            similarity = 0.0
-                    
-                    similarities.append({
-                        'item': poem,
-                        'similarity': float(similarity)  # Convert to Python float
-                    })
-            
-            # Sort by similarity and return top_k
-            similarities.sort(key=lambda x: x['similarity'], reverse=True)
-            return similarities[:top_k]
+            return self._index_similarity_search(vector, existing_item_ids, top_k)
             
         except Exception as e:
             print(f"Error in manual similarity search: {e}")
             return []
     
+    def _load_profile_index(self) -> VectorIndex:
+        """Centroid matrix over every vibe profile, reloaded when older than PROFILE_INDEX_REFRESH_SECONDS."""
+        if self.profile_index is not None and \
+                time.monotonic() - self._profile_index_loaded_at < self.PROFILE_INDEX_REFRESH_SECONDS:
+            return self.profile_index
+        
+        pagination = SupabasePagination(self.supabase, 'vibe_profiles')
+        profiles = pagination.get_all_records_list(
+            select_fields=vibe_profile_fields('centroid'),
+            order_by='id',
+            order_desc=False
+        )
+        index = VectorIndex(dim=self.embedding_dim)
+        index.build({
+            'id': profile['id'],
+            'name': profile.get('name'),
+            'size': profile.get('size'),
+            'embedding': profile.get('vector')
+        } for profile in profiles if profile.get('size'))
+        
+        self.profile_index = index
+        self._profile_index_loaded_at = time.monotonic()
+        return index
+    
+    def _refresh_profile_centroid(self, vibe_profile_id: str, vector: Optional[List[float]] = None, **fields):
+        """Update one profile's row of the loaded centroid index (new vector and/or card fields)."""
+        index = self.profile_index
+        if index is None:
+            return
+        card = dict(index.get_item(vibe_profile_id) or {'id': vibe_profile_id})
+        card.update(fields)
+        if not card.get('size'):
+            # Empty profiles have no centroid and are left out of the index, as in _load_profile_index;
+            # rows cannot be dropped from the centroid matrix, so reload it on next use
+            if vibe_profile_id in index:
+                self.profile_index = None
+            return
+        if vector is None:
+            vector = index.get_vector(vibe_profile_id)
+        if vector is not None:
+            index.add(vibe_profile_id, vector, card)
+    
+    def search_vibe_profiles(self, embedding: List[float], top_k: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        """Rank vibe profiles by the cosine similarity of their centroids to a query embedding."""
+        try:
+            index = self._load_profile_index()
+            return [{
+                'vibe_profile': index.get_item(vibe_profile_id),
+                'similarity': similarity
+            } for vibe_profile_id, similarity in index.search(embedding, top_k, offset)]
+        except Exception as e:
+            print(f"Error searching vibe profiles: {e}")
+            return []
+    
     def delete_vibe_profile(self, vibe_profile_id: str) -> bool:
         """Delete a vibe profile and all its associated items."""
         try:
@@ -559,6 +679,9 @@ class VibeProfileManager:
             delete_vibe_result = self.supabase.table('vibe_profiles').delete().eq('id', vibe_profile_id).execute()
             
             if delete_vibe_result.data:
+                self.result_cache.invalidate(('vibe_profile', vibe_profile_id))
+                # Rows cannot be dropped from the centroid matrix; reload it on next use
+                self.profile_index = None
                 print(f"Successfully deleted vibe profile {vibe_profile_id}")
                 return True
             else:
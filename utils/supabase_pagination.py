@@ -71,10 +71,10 @@ class SupabasePagination:
                             query = query.ilike(field[:-6], value)
                         elif field.endswith('_in'):
                             query = query.in_(field[:-3], value)
+                        elif field.endswith('_not_is'):
+                            query = query.not_.is_(field[:-7], value)
                         elif field.endswith('_is'):
                             query = query.is_(field[:-3], value)
-                        elif field.endswith('_not_is'):
-                            query = query.not_.is_(field[:-8], value)
                         else:
                             # Default to equality
                             query = query.eq(field, value)
@@ -182,10 +182,10 @@ class SupabasePagination:
                         query = query.ilike(field[:-6], value)
                     elif field.endswith('_in'):
                         query = query.in_(field[:-3], value)
+                    elif field.endswith('_not_is'):
+                        query = query.not_.is_(field[:-7], value)
                     elif field.endswith('_is'):
                         query = query.is_(field[:-3], value)
-                    elif field.endswith('_not_is'):
-                        query = query.not_.is_(field[:-8], value)
                     else:
                         query = query.eq(field, value)
             